@@ -1,9 +1,11 @@
 import streamlit as st
-import requests
 import json
 from datetime import datetime
 from urllib.parse import urlparse
-from sql import insert_url_data
+import codec
+from profiling import phase, profile_session
+# requests and sql (psycopg2) are imported lazily inside the Validate / Mock API
+# handlers so a cold start and plain form reruns do not pay for them
 
 
 # Page config
@@ -13,12 +15,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Set page name for sidebar navigation
-if "page_name" not in st.session_state:
-    st.session_state.page_name = "Service Virtualization"
+# Opt-in (SV_PROFILE=1) per-phase timings for this page load; the with block also
+# closes the session when st.rerun() or st.stop() ends the script early
+with profile_session("command-center"):
 
-# Custom CSS
-st.markdown("""
+    # Set page name for sidebar navigation
+    if "page_name" not in st.session_state:
+        st.session_state.page_name = "Service Virtualization"
+
+
+    @st.cache_resource
+    def load_page_css():
+        """Page CSS, built once per server process"""
+        return """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -54,306 +63,479 @@ st.markdown("""
         background-color: #f8f9fa;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+    @st.cache_resource
+    def load_logo():
+        """Logo bytes, read from disk once per server process"""
+        with open("src/ValueMomentum_logo.png", "rb") as logo_file:
+            return logo_file.read()
+
+
+    # Custom CSS
+    st.markdown(load_page_css(), unsafe_allow_html=True)
+
+
+    st.image(load_logo(), width=100)
 
+    st.markdown('<div class="main-header">Command Center(NPE Services Virtualization)</div>', unsafe_allow_html=True)
 
-st.image("src/ValueMomentum_logo.png", width=100)
 
-st.markdown('<div class="main-header">Command Center(NPE Services Virtualization)</div>', unsafe_allow_html=True)
 
+    # Request layout: these controls change which form fields exist, so they live
+    # outside the form and are the only widgets that rerun the page on change
+    with st.expander("Request Layout", expanded=False):
+        layout_cols = st.columns(5)
+        with layout_cols[0]:
+            num_headers = st.number_input("Number of headers", min_value=0, max_value=10, value=1)
+        with layout_cols[1]:
+            num_params = st.number_input("Number of parameters", min_value=0, max_value=10, value=0)
+        with layout_cols[2]:
+            auth_type = st.selectbox("Authorization Type", ["None", "Bearer Token", "Basic Auth", "API Key"])
+        with layout_cols[3]:
+            body_type = st.selectbox("Body Type", ["None", "JSON", "Form Data", "Raw Text"])
+        with layout_cols[4]:
+            num_fields = st.number_input("Number of form fields", min_value=0, max_value=10, value=1, disabled=body_type != "Form Data")
+        multi_env = st.checkbox("Multi-environment validate", help="Send the request to a base URL per environment in parallel and compare the responses")
 
 
-# Main interface
-# st.write(get_routing_url())
-col1, col2 = st.columns([1, 1])
+    # Everything below is batched: typing does not rerun the script until a
+    # Validate or Mock API submit
+    request_form = st.form("request_form", border=False)
 
-with col1:
-    st.subheader("Request Configuration")
+    with request_form:
+        col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.subheader("Request Configuration")
     
-    # Name and Description fields
-    url_name = st.text_input("Name", placeholder="Enter a name for this URL")
-    url_description = st.text_area("Description", placeholder="Enter a description for this URL", height=100)
+        # Name and Description fields
+        url_name = st.text_input("Name", placeholder="Enter a name for this URL")
+        url_description = st.text_area("Description", placeholder="Enter a description for this URL", height=100)
     
-    # HTTP Method and URL
-    method_col, url_col = st.columns([1, 4])
-    with method_col:
-        method = st.selectbox("Method", ["GET", "POST", "PUT", "DELETE", "PATCH"])
-    with url_col:
-        url = st.text_input("Enter API URL", placeholder="https://api.example.com/endpoint", label_visibility="visible")
-        st.caption("Note: If mocking JSON directly, enter 'Not Applicable' as URL")
+        # HTTP Method and URL
+        method_col, url_col = st.columns([1, 4])
+        with method_col:
+            method = st.selectbox("Method", ["GET", "POST", "PUT", "DELETE", "PATCH"])
+        with url_col:
+            url = st.text_input("Enter API URL", placeholder="https://api.example.com/endpoint", label_visibility="visible")
+            st.caption("Note: If mocking JSON directly, enter 'Not Applicable' as URL")
     
-    # Tabs for different configurations
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Headers", "Authorization", "Body", "Params", "Mock Response", "API Details"])
+        # Tabs for different configurations
+        tab_names = ["Headers", "Authorization", "Body", "Params", "Mock Response", "API Details"]
+        if multi_env:
+            tab_names.append("Environments")
+        tabs = st.tabs(tab_names)
+        tab1, tab2, tab3, tab4, tab5, tab6 = tabs[:6]
     
-    with tab1:
-        st.write("**Headers**")
-        headers = {}
-        num_headers = st.number_input("Number of headers", min_value=0, max_value=10, value=1)
-        for i in range(num_headers):
-            col_key, col_value = st.columns(2)
-            with col_key:
-                key = st.text_input(f"Header {i+1} Key", key=f"header_key_{i}")
-            with col_value:
-                value = st.text_input(f"Header {i+1} Value", key=f"header_value_{i}")
-            if key and value:
-                headers[key] = value
+        with tab1:
+            st.write("**Headers**")
+            headers = {}
+            for i in range(num_headers):
+                col_key, col_value = st.columns(2)
+                with col_key:
+                    key = st.text_input(f"Header {i+1} Key", key=f"header_key_{i}")
+                with col_value:
+                    value = st.text_input(f"Header {i+1} Value", key=f"header_value_{i}")
+                if key and value:
+                    headers[key] = value
     
-    with tab2:
-        st.write("**Authorization**")
-        auth_type = st.selectbox("Type", ["None", "Bearer Token", "Basic Auth", "API Key"])
+        with tab2:
+            st.write("**Authorization**")
+            st.caption(f"Type: {auth_type} (change it under Request Layout)")
         
-        auth_headers = {}
-        if auth_type == "Bearer Token":
-            token = st.text_input("Token", type="password")
-            if token:
-                auth_headers["Authorization"] = f"Bearer {token}"
-        elif auth_type == "Basic Auth":
-            username = st.text_input("Username")
-            password = st.text_input("Password", type="password")
-            if username and password:
-                import base64
-                credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
-                auth_headers["Authorization"] = f"Basic {credentials}"
-        elif auth_type == "API Key":
-            key_name = st.text_input("Key Name", value="X-API-Key")
-            api_key = st.text_input("API Key", type="password")
-            if key_name and api_key:
-                auth_headers[key_name] = api_key
+            auth_headers = {}
+            if auth_type == "Bearer Token":
+                token = st.text_input("Token", type="password")
+                if token:
+                    auth_headers["Authorization"] = f"Bearer {token}"
+            elif auth_type == "Basic Auth":
+                username = st.text_input("Username")
+                password = st.text_input("Password", type="password")
+                if username and password:
+                    import base64
+                    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+                    auth_headers["Authorization"] = f"Basic {credentials}"
+            elif auth_type == "API Key":
+                key_name = st.text_input("Key Name", value="X-API-Key")
+                api_key = st.text_input("API Key", type="password")
+                if key_name and api_key:
+                    auth_headers[key_name] = api_key
     
-    with tab3:
-        st.write("**Request Body**")
-        body_type = st.selectbox("Body Type", ["None", "JSON", "Form Data", "Raw Text"])
+        with tab3:
+            st.write("**Request Body**")
+            st.caption(f"Type: {body_type} (change it under Request Layout)")
         
-        body_data = None
-        if body_type == "JSON":
-            body_text = st.text_area("JSON Body", height=150, placeholder='{"key": "value"}')
-            if body_text:
-                try:
-                    body_data = json.loads(body_text)
-                    headers["Content-Type"] = "application/json"
-                except json.JSONDecodeError:
-                    st.error("Invalid JSON format")
-        elif body_type == "Form Data":
-            num_fields = st.number_input("Number of fields", min_value=0, max_value=10, value=1)
-            form_data = {}
-            for i in range(num_fields):
+            body_data = None
+            if body_type == "JSON":
+                body_text = st.text_area("JSON Body", height=150, placeholder='{"key": "value"}')
+                if body_text:
+                    try:
+                        body_data = codec.loads(body_text)
+                        headers["Content-Type"] = "application/json"
+                    except ValueError:
+                        st.error("Invalid JSON format")
+            elif body_type == "Form Data":
+                form_data = {}
+                for i in range(num_fields):
+                    col_key, col_value = st.columns(2)
+                    with col_key:
+                        key = st.text_input(f"Field {i+1} Key", key=f"form_key_{i}")
+                    with col_value:
+                        value = st.text_input(f"Field {i+1} Value", key=f"form_value_{i}")
+                    if key and value:
+                        form_data[key] = value
+                if form_data:
+                    body_data = form_data
+            elif body_type == "Raw Text":
+                body_data = st.text_area("Raw Body", height=150)
+    
+        with tab4:
+            st.write("**Query Parameters**")
+            params = {}
+            for i in range(num_params):
                 col_key, col_value = st.columns(2)
                 with col_key:
-                    key = st.text_input(f"Field {i+1} Key", key=f"form_key_{i}")
+                    key = st.text_input(f"Param {i+1} Key", key=f"param_key_{i}")
                 with col_value:
-                    value = st.text_input(f"Field {i+1} Value", key=f"form_value_{i}")
+                    value = st.text_input(f"Param {i+1} Value", key=f"param_value_{i}")
                 if key and value:
-                    form_data[key] = value
-            if form_data:
-                body_data = form_data
-        elif body_type == "Raw Text":
-            body_data = st.text_area("Raw Body", height=150)
-    
-    with tab4:
-        st.write("**Query Parameters**")
-        params = {}
-        num_params = st.number_input("Number of parameters", min_value=0, max_value=10, value=0)
-        for i in range(num_params):
-            col_key, col_value = st.columns(2)
-            with col_key:
-                key = st.text_input(f"Param {i+1} Key", key=f"param_key_{i}")
-            with col_value:
-                value = st.text_input(f"Param {i+1} Value", key=f"param_value_{i}")
-            if key and value:
-                params[key] = value
-    with tab5:
-        st.write("**Mock Response (Only for 'Not Applicable' URLs)**")
-        mock_response_text = None
-        if url and url.lower() in ['not applicable', 'na', 'n/a']:
+                    params[key] = value
+        with tab5:
+            st.write("**Mock Response (Only for 'Not Applicable' URLs)**")
             mock_response_text = st.text_area("Enter Mock JSON Response", height=200, placeholder='{"status": "success", "data": []}', key="mock_response_input")
-            if mock_response_text:
-                try:
-                    mock_response_json = json.loads(mock_response_text)
-                    st.success("✓ Valid JSON format")
-                except json.JSONDecodeError:
-                    st.error("✗ Invalid JSON format")
-        else:
-            st.info("This tab is only enabled when URL is set to 'Not Applicable'")
+            if url and url.lower() in ['not applicable', 'na', 'n/a']:
+                if mock_response_text:
+                    try:
+                        codec.loads(mock_response_text)
+                        st.success("✓ Valid JSON format")
+                    except ValueError:
+                        st.error("✗ Invalid JSON format")
+            else:
+                st.info("This response is only used when URL is set to 'Not Applicable'")
+    
+        with tab6:
+            st.write("**API Details**")
+            st.text_area("API Documentation", height=150)
+            st.write("**Environment**")
+            env = st.selectbox("Environment", ["Dev", "Test", "Staging", "Prod"])
+            st.write("**LOB**")
+            lob = st.selectbox("Line of Business", ["Policy", "Claims", "Small Business"])
     
-    with tab6:
-        st.write("**API Details**")
-        st.text_area("API Documentation", height=150)
-        st.write("**Environment**")
-        env = st.selectbox("Environment", ["Dev", "Test", "Staging", "Prod"])
-        st.write("**LOB**")
-        lob = st.selectbox("Line of Business", ["Policy", "Claims", "Small Business"])
+        base_urls = {}
+        if multi_env:
+            with tabs[6]:
+                st.write("**Environment Base URLs**")
+                st.caption("The path and query of the API URL are appended to each base URL. Leave an environment empty to skip it.")
+                for environment_name in ["Dev", "Test", "Staging", "Prod"]:
+                    base_urls[environment_name] = st.text_input(f"{environment_name} Base URL", placeholder=f"https://{environment_name.lower()}.example.com", key=f"base_url_{environment_name}")
 
-with col2:
-    st.subheader("Validate")
+    with col2:
+        st.subheader("Validate")
     
-    # Initialize session state for storing validated response
-    if 'validated_response' not in st.session_state:
-        st.session_state.validated_response = None
+        # Initialize session state for storing validated response
+        if 'validated_response' not in st.session_state:
+            st.session_state.validated_response = None
+        if 'multi_results' not in st.session_state:
+            st.session_state.multi_results = None
     
-    # Send button
-    if st.button("Validate", type="primary", use_container_width=True):
-        if not url:
-            st.error("Please enter a URL")
-        elif url.lower() in ['not applicable', 'na', 'n/a']:
-            # Handle Not Applicable URLs with mock response
-            if 'mock_response_input' in st.session_state and st.session_state.mock_response_input:
-                try:
-                    mock_response_json = json.loads(st.session_state.mock_response_input)
-                    st.session_state.validated_response = json.dumps(mock_response_json)
+        # Submit buttons for the batched request form
+        submit_cols = st.columns(2)
+        with submit_cols[0]:
+            validate_clicked = st.form_submit_button("Validate", type="primary", use_container_width=True)
+        with submit_cols[1]:
+            mock_clicked = st.form_submit_button("Mock API", use_container_width=True)
+    
+        if validate_clicked:
+            st.session_state.multi_results = None
+            if not url:
+                st.error("Please enter a URL")
+            elif url.lower() in ['not applicable', 'na', 'n/a']:
+                # Handle Not Applicable URLs with mock response
+                if 'mock_response_input' in st.session_state and st.session_state.mock_response_input:
+                    try:
+                        mock_response_json = codec.loads(st.session_state.mock_response_input)
+                        # Already valid JSON, store the text as entered instead of re-serializing
+                        st.session_state.validated_response = st.session_state.mock_response_input
                     
-                    st.markdown(f"""
+                        st.markdown(f"""
                     <div class="response-success">
                         <span class="status-code">Status: Mock Response Validated</span>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    st.json(mock_response_json)
+                        st.json(mock_response_json)
                     
-                except json.JSONDecodeError:
-                    st.error("Invalid JSON format in Mock Response tab")
+                    except ValueError:
+                        st.error("Invalid JSON format in Mock Response tab")
+                else:
+                    st.error("Please enter a mock JSON response in the 'Mock Response' tab")
+            elif multi_env:
+                import multi_validate
+                targets = multi_validate.build_target_urls(url, base_urls)
+                if not targets:
+                    st.error("Please enter at least one base URL in the 'Environments' tab")
+                else:
+                    results = multi_validate.validate_targets(
+                        method,
+                        targets,
+                        headers={**headers, **auth_headers},
+                        params=params,
+                        body_type=body_type,
+                        body_data=body_data
+                    )
+                    st.session_state.multi_results = {
+                        environment_name: {'url': result['url'], 'validated_response': result.get('validated_response')}
+                        for environment_name, result in results.items()
+                        if result.get('validated_response') is not None
+                    }
+                
+                    # Status and timing side by side
+                    st.dataframe(
+                        [
+                            {
+                                "Environment": environment_name,
+                                "URL": result['url'],
+                                "Status": result.get('status_code', 'Error'),
+                                "Time (ms)": round(result['response_time']) if 'response_time' in result else None,
+                                "Size (bytes)": result.get('content_length'),
+                                "Error": result.get('error'),
+                            }
+                            for environment_name, result in results.items()
+                        ],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                
+                    body_cols = st.columns(len(results))
+                    for body_col, (environment_name, result) in zip(body_cols, results.items()):
+                        with body_col:
+                            st.write(f"**{environment_name}**")
+                            if result.get('json') is not None:
+                                st.json(result['json'], expanded=False)
+                            else:
+                                st.code(result.get('text') or result.get('error') or "")
+                
+                    # Diff every environment against the first one
+                    environment_names = list(results)
+                    baseline_name = environment_names[0]
+                    for environment_name in environment_names[1:]:
+                        diff = multi_validate.diff_results(baseline_name, results[baseline_name], environment_name, results[environment_name])
+                        with st.expander(f"Diff: {baseline_name} vs {environment_name}", expanded=bool(diff)):
+                            if diff:
+                                st.code(diff, language="diff")
+                            else:
+                                st.success("Responses are identical")
             else:
-                st.error("Please enter a mock JSON response in the 'Mock Response' tab")
-        else:
-            try:
-                # Combine headers
-                all_headers = {**headers, **auth_headers}
+                import requests
+                try:
+                    # Combine headers
+                    all_headers = {**headers, **auth_headers}
                 
-                # Make request
-                start_time = datetime.now()
+                    # Make request
+                    start_time = datetime.now()
                 
-                if method == "GET":
-                    response = requests.get(url, headers=all_headers, params=params)
-                elif method == "POST":
-                    if body_type == "JSON" and body_data:
-                        response = requests.post(url, headers=all_headers, params=params, json=body_data)
-                    else:
-                        response = requests.post(url, headers=all_headers, params=params, data=body_data)
-                elif method == "PUT":
-                    if body_type == "JSON" and body_data:
-                        response = requests.put(url, headers=all_headers, params=params, json=body_data)
-                    else:
-                        response = requests.put(url, headers=all_headers, params=params, data=body_data)
-                elif method == "DELETE":
-                    response = requests.delete(url, headers=all_headers, params=params)
-                elif method == "PATCH":
-                    if body_type == "JSON" and body_data:
-                        response = requests.patch(url, headers=all_headers, params=params, json=body_data)
-                    else:
-                        response = requests.patch(url, headers=all_headers, params=params, data=body_data)
+                    with phase("http"):
+                        if method == "GET":
+                            response = requests.get(url, headers=all_headers, params=params)
+                        elif method == "POST":
+                            if body_type == "JSON" and body_data:
+                                response = requests.post(url, headers=all_headers, params=params, json=body_data)
+                            else:
+                                response = requests.post(url, headers=all_headers, params=params, data=body_data)
+                        elif method == "PUT":
+                            if body_type == "JSON" and body_data:
+                                response = requests.put(url, headers=all_headers, params=params, json=body_data)
+                            else:
+                                response = requests.put(url, headers=all_headers, params=params, data=body_data)
+                        elif method == "DELETE":
+                            response = requests.delete(url, headers=all_headers, params=params)
+                        elif method == "PATCH":
+                            if body_type == "JSON" and body_data:
+                                response = requests.patch(url, headers=all_headers, params=params, json=body_data)
+                            else:
+                                response = requests.patch(url, headers=all_headers, params=params, data=body_data)
                 
-                end_time = datetime.now()
-                response_time = (end_time - start_time).total_seconds() * 1000
+                    end_time = datetime.now()
+                    response_time = (end_time - start_time).total_seconds() * 1000
                 
-                # Store validated response for mock API
-                try:
-                    st.session_state.validated_response = response.text
-                except:
-                    st.session_state.validated_response = response.text
+                    # Parse the body once; reuse it for storage and display
+                    try:
+                        json_response = codec.loads(response.content)
+                    except ValueError:
+                        json_response = None
                 
-                # Display response
-                status_color = "success" if 200 <= response.status_code < 300 else "error"
+                    # Store validated response for mock API
+                    if json_response is not None:
+                        st.session_state.validated_response = response.content.decode("utf-8", errors="replace")
+                    else:
+                        st.session_state.validated_response = codec.dumps(response.text)
+                
+                    # Display response
+                    status_color = "success" if 200 <= response.status_code < 300 else "error"
                 
-                st.markdown(f"""
+                    st.markdown(f"""
                 <div class="response-{status_color}">
                     <span class="status-code">Status: {response.status_code}</span>
                     <span style="float: right;">Time: {response_time:.0f}ms</span>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Response tabs
-                resp_tab1, resp_tab2, resp_tab3 = st.tabs(["Body", "Headers", "Raw"])
+                    # Response tabs
+                    resp_tab1, resp_tab2, resp_tab3 = st.tabs(["Body", "Headers", "Raw"])
                 
-                with resp_tab1:
-                    try:
-                        json_response = response.json()
+                    with resp_tab1:
+                        if json_response is not None:
+                            with st.container():
+                                st.markdown('<div class="scrollable-json">', unsafe_allow_html=True)
+                                st.json(json_response)
+                                st.markdown('</div>', unsafe_allow_html=True)
+                        else:
+                            st.text_area("Response", response.text, height=300)
+                
+                    with resp_tab2:
                         with st.container():
                             st.markdown('<div class="scrollable-json">', unsafe_allow_html=True)
-                            st.json(json_response)
+                            st.json(dict(response.headers))
                             st.markdown('</div>', unsafe_allow_html=True)
-                    except:
-                        st.text_area("Response", response.text, height=300)
-                
-                with resp_tab2:
-                    with st.container():
-                        st.markdown('<div class="scrollable-json">', unsafe_allow_html=True)
-                        st.json(dict(response.headers))
-                        st.markdown('</div>', unsafe_allow_html=True)
                 
-                with resp_tab3:
-                    st.text(f"Status Code: {response.status_code}")
-                    st.text(f"Response Time: {response_time:.0f}ms")
-                    st.text(f"Content Length: {len(response.content)} bytes")
-                    st.text("Raw Response:")
-                    st.code(response.text)
+                    with resp_tab3:
+                        st.text(f"Status Code: {response.status_code}")
+                        st.text(f"Response Time: {response_time:.0f}ms")
+                        st.text(f"Content Length: {len(response.content)} bytes")
+                        st.text("Raw Response:")
+                        st.code(response.text)
                 
-            except requests.exceptions.RequestException as e:
-                st.error(f"Request failed: {str(e)}")
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"Request failed: {str(e)}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
     
     
-    # Mock API button
-    if st.button("Mock API", use_container_width=True):
-        if st.session_state.validated_response is None:
-            st.error("Please validate an API first to get response data for mocking")
-        else:
-            try:
-                # Handle routing URL based on URL type
-                if url.lower() in ['not applicable', 'na', 'n/a']:
-                    # Use name as routing URL for Not Applicable
-                    mock_path = f"/{url_name.lower().replace(' ', '-')}" if url_name else "/unnamed-api"
-                else:
-                    # Extract path from URL
+        # Mock API button
+        if mock_clicked and multi_env and url.lower() not in ['not applicable', 'na', 'n/a']:
+            if not st.session_state.multi_results:
+                st.error("Please run a multi-environment validation first to get response data for mocking")
+            else:
+                from sql import insert_url_data_batch
+                from compression import precompress_in_background
+                try:
                     parsed_url = urlparse(url)
                     mock_path = parsed_url.path
                     if parsed_url.query:
                         mock_path += f"?{parsed_url.query}"
                 
-                # Prepare API details as JSON
-                api_details_data = {
-                    "environment": env if 'env' in locals() else "Not specified",
-                    "line_of_business": lob if 'lob' in locals() else "Not specified",
-                    "headers": {**headers, **auth_headers},
-                    "parameters": params,
-                    "body_type": body_type if 'body_type' in locals() else "None",
-                    "body_data": body_data,
-                    "auth_type": auth_type if 'auth_type' in locals() else "None",
-                    "original_response": st.session_state.validated_response,
-                    "created_timestamp": datetime.now().isoformat()
-                }
+                    # One record per environment, inserted in a single statement
+                    records = []
+                    for environment_name, result in st.session_state.multi_results.items():
+                        api_details_data = {
+                            "environment": environment_name,
+                            "line_of_business": lob,
+                            "headers": {**headers, **auth_headers},
+                            "parameters": params,
+                            "body_type": body_type,
+                            "body_data": body_data,
+                            "auth_type": auth_type,
+                            "original_response": result['validated_response'],
+                            "created_timestamp": datetime.now().isoformat()
+                        }
+                        records.append({
+                            "name": url_name if url_name else "Unnamed API",
+                            "description": url_description if url_description else None,
+                            "original_url": result['url'],
+                            "operation": method,
+                            # Prefixed with the environment so each record gets its own route
+                            "routing_url": f"/{environment_name.lower()}{mock_path}",
+                            "headers": codec.dumps({**headers, **auth_headers}),
+                            "parameters": codec.dumps(params),
+                            "response": result['validated_response'],
+                            "api_details": codec.dumps(api_details_data),
+                            "lob": lob,
+                            "environment": environment_name,
+                        })
                 
-                # Store in database with LOB and Environment
-                inserted_id = insert_url_data(
-                    name=url_name if url_name else "Unnamed API",
-                    original_url=url,
-                    routing_url=mock_path,
-                    description=url_description if url_description else None,
-                    operation=method,
-                    headers=json.dumps({**headers, **auth_headers}),
-                    parameters=json.dumps(params),
-                    response=st.session_state.validated_response,
-                    api_details=json.dumps(api_details_data),
-                    lob=lob if 'lob' in locals() else None,
-                    environment=env if 'env' in locals() else None
-                )
+                    inserted_ids = insert_url_data_batch(records)
                 
-                if inserted_id:
-                    st.success(f"Mock API created and inserted into database with ID: {inserted_id}")
+                    if inserted_ids:
+                        for record in records:
+                            precompress_in_background(inserted_ids[record['environment']], record['response'], environment=record['environment'])
+                        st.success(f"Mock APIs created for {', '.join(record['environment'] for record in records)} with IDs: {list(inserted_ids.values())}")
                     
-                    # Display routing portal information
-                    routing_base_url = "https://routing-portal-d3id.vercel.app"
-                    st.info(f"**Routing Portal Base URL:** `{routing_base_url}/route?routing_url={mock_path}`")
-                else:
-                    st.warning("Failed to insert data into database")
+                        # Display routing portal information, one route per environment
+                        routing_base_url = "https://routing-portal-d3id.vercel.app"
+                        for record in records:
+                            st.info(f"**{record['environment']}** (ID {inserted_ids[record['environment']]}): `{routing_base_url}/route?routing_url={record['routing_url']}`")
+                    else:
+                        st.warning("Failed to insert data into database")
+                    
+                except Exception as e:
+                    st.error(f"Mock API error: {str(e)}")
+    
+        elif mock_clicked:
+            if st.session_state.validated_response is None:
+                st.error("Please validate an API first to get response data for mocking")
+            else:
+                from sql import insert_url_data
+                try:
+                    # Handle routing URL based on URL type
+                    if url.lower() in ['not applicable', 'na', 'n/a']:
+                        # Use name as routing URL for Not Applicable
+                        mock_path = f"/{url_name.lower().replace(' ', '-')}" if url_name else "/unnamed-api"
+                    else:
+                        # Extract path from URL
+                        parsed_url = urlparse(url)
+                        mock_path = parsed_url.path
+                        if parsed_url.query:
+                            mock_path += f"?{parsed_url.query}"
+                
+                    # Prepare API details as JSON
+                    api_details_data = {
+                        "environment": env if 'env' in locals() else "Not specified",
+                        "line_of_business": lob if 'lob' in locals() else "Not specified",
+                        "headers": {**headers, **auth_headers},
+                        "parameters": params,
+                        "body_type": body_type if 'body_type' in locals() else "None",
+                        "body_data": body_data,
+                        "auth_type": auth_type if 'auth_type' in locals() else "None",
+                        "original_response": st.session_state.validated_response,
+                        "created_timestamp": datetime.now().isoformat()
+                    }
+                
+                    # Store in database with LOB and Environment
+                    inserted_id = insert_url_data(
+                        name=url_name if url_name else "Unnamed API",
+                        original_url=url,
+                        routing_url=mock_path,
+                        description=url_description if url_description else None,
+                        operation=method,
+                        headers=codec.dumps({**headers, **auth_headers}),
+                        parameters=codec.dumps(params),
+                        response=st.session_state.validated_response,
+                        api_details=codec.dumps(api_details_data),
+                        lob=lob if 'lob' in locals() else None,
+                        environment=env if 'env' in locals() else None
+                    )
+                
+                    if inserted_id:
+                        from compression import precompress_in_background
+                        precompress_in_background(inserted_id, st.session_state.validated_response, environment=env)
+                        st.success(f"Mock API created and inserted into database with ID: {inserted_id}")
+                    
+                        # Display routing portal information
+                        routing_base_url = "https://routing-portal-d3id.vercel.app"
+                        st.info(f"**Routing Portal Base URL:** `{routing_base_url}/route?routing_url={mock_path}`")
+                    else:
+                        st.warning("Failed to insert data into database")
                     
-            except Exception as e:
-                st.error(f"Mock API error: {str(e)}")
+                except Exception as e:
+                    st.error(f"Mock API error: {str(e)}")
     
-    # Request preview
-    st.subheader("Request Preview")
-    if url:
-        preview_headers = {**headers, **auth_headers}
-        st.code(f"""
+        # Request preview
+        st.subheader("Request Preview")
+        if url:
+            preview_headers = {**headers, **auth_headers}
+            st.code(f"""
 {method} {url}
 Headers: {json.dumps(preview_headers, indent=2) if preview_headers else 'None'}
 Params: {json.dumps(params, indent=2) if params else 'None'}
@@ -361,6 +543,6 @@ Body: {json.dumps(body_data, indent=2) if body_data else 'None'}
         """)
     
 
-# Footer
-st.markdown("---")
-st.markdown("© 2026 ValueMomentum. All Rights Reserved.")
\ No newline at end of file
+    # Footer
+    st.markdown("---")
+    st.markdown("© 2026 ValueMomentum. All Rights Reserved.")
@@ -0,0 +1,154 @@
+import time
+import threading
+from urllib.parse import urlparse
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def host_of(url):
+    """Return the host (netloc) part of a URL, used as the breaker/limiter key"""
+    return urlparse(url).netloc.lower()
+
+
+class HostCircuitBreaker:
+    """
+    Circuit breaker for a single upstream host
+
+    Opens after failure_threshold consecutive failures, stays open for
+    reset_timeout seconds, then lets half_open_probes requests through. A
+    successful probe closes the breaker; a failed one opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=300, half_open_probes=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes_in_flight = 0
+
+    def allow_request(self):
+        """Check whether a request to this host may be made now"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes_in_flight = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probes_in_flight = 0
+
+
+class HostRateLimiter:
+    """Token bucket limiting requests per second to a single upstream host"""
+
+    def __init__(self, rate_per_second=5, burst=5):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self):
+        """Seconds to wait until a token is available (0 if one is available now)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate_per_second
+
+    def acquire(self):
+        """Take a token; call only after wait_time() returned 0 or that long was slept"""
+        self._refill()
+        self.tokens = max(0, self.tokens - 1)
+
+
+class HostGuard:
+    """
+    Per-host circuit breakers and rate limiters, created on first use
+
+    try_acquire() and record_result() hold a lock, so one guard can be shared by
+    the scheduler and the portal's refresh worker threads.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=300, half_open_probes=1, rate_per_second=5, burst=5):
+        self.breaker_settings = (failure_threshold, reset_timeout, half_open_probes)
+        self.limiter_settings = (rate_per_second, burst)
+        self.breakers = {}
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = HostCircuitBreaker(*self.breaker_settings)
+        return self.breakers[host]
+
+    def limiter(self, host):
+        if host not in self.limiters:
+            self.limiters[host] = HostRateLimiter(*self.limiter_settings)
+        return self.limiters[host]
+
+    def try_acquire(self, host):
+        """
+        Reserve one request to a host under its rate limit and circuit breaker
+
+        Returns:
+            tuple: (wait, allowed). A non-zero wait means no token is available yet:
+                sleep that long and call again. Otherwise allowed tells whether the
+                breaker let the request through; a token is only taken if it did.
+        """
+        with self.lock:
+            limiter = self.limiter(host)
+            wait = limiter.wait_time()
+            if wait:
+                return wait, False
+            # Checked after the limiter so a half-open probe is only taken when the request is sent
+            if not self.breaker(host).allow_request():
+                return 0, False
+            limiter.acquire()
+            return 0, True
+
+    def record_result(self, host, result):
+        """
+        Feed the outcome of a request to the host's breaker
+
+        Upstream errors and 5xx responses count as failures; a 4xx means the host is reachable.
+
+        Args:
+            host (str): Host from host_of()
+            result (dict): Result of hit_original_url() (status_code or error)
+        """
+        with self.lock:
+            breaker = self.breaker(host)
+            if 'error' in result or result.get('status_code', 0) >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    def open_hosts(self):
+        """Hosts whose breaker is currently open"""
+        return [host for host, breaker in self.breakers.items() if breaker.state == OPEN]
@@ -0,0 +1,106 @@
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Distinct header/parameter values kept decoded; bounded so memory stays flat as the catalog grows
+FIELD_CACHE_SIZE = 4096
+
+
+def loads(data):
+    """Parse JSON from str or bytes using the fastest available decoder"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Serialize to a JSON str using the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def is_valid_json(data):
+    """Check whether raw str or bytes are a valid JSON document"""
+    try:
+        loads(data)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def to_json_text(payload):
+    """
+    Convert a payload to JSON text for storage, without re-encoding raw JSON
+
+    Args:
+        payload: Raw bytes/str from an upstream response, or a dict/list
+
+    Returns:
+        str: JSON text ready to be written to a json column
+    """
+    if isinstance(payload, (dict, list)):
+        return dumps(payload)
+    if isinstance(payload, bytes):
+        if is_valid_json(payload):
+            return payload.decode("utf-8")
+        return dumps(payload.decode("utf-8", errors="replace"))
+    if isinstance(payload, str):
+        if is_valid_json(payload):
+            return payload
+        return dumps(payload)
+    return dumps(payload)
+
+
+def response_to_json_text(response):
+    """
+    Turn a requests.Response into JSON text, passing valid JSON bytes straight through
+
+    Args:
+        response (requests.Response): The upstream response
+
+    Returns:
+        str: JSON text of the body, or the body text encoded as a JSON string
+    """
+    raw = response.content
+    if is_valid_json(raw):
+        return raw.decode("utf-8", errors="replace")
+    return dumps(response.text)
+
+
+def decode_record_field(record, field):
+    """
+    Decode a JSON-encoded record field such as headers or parameters
+
+    Results are cached by the raw field value in a bounded LRU, so unchanged
+    headers and parameters are not re-parsed every scheduler cycle, even though
+    each refresh bumps the record's updated_at.
+
+    Args:
+        record (dict): Record from the service_virtualisation table
+        field (str): Column name, e.g. 'headers' or 'parameters'
+
+    Returns:
+        dict: The decoded value, or an empty dict if missing
+
+    Raises:
+        ValueError: If the stored value is not valid JSON
+    """
+    value = record.get(field)
+    if not value:
+        return {}
+    if not isinstance(value, (str, bytes)):
+        return value
+
+    return _decode_field(field, value)
+
+
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
+def _decode_field(field, value):
+    # Invalid JSON raises and is not cached
+    return loads(value)
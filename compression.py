@@ -0,0 +1,294 @@
+import gzip
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from templates import compile_template
+
+
+# Bodies smaller than this are only stored as identity; compression would not pay off
+MIN_COMPRESS_SIZE = 1024
+
+# Moderate levels: most of the max ratio on JSON at a fraction of the CPU of br 11 / zstd 19
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'zstd', 'gzip', 'identity')
+
+# Precompressed variants keyed by record id -> (version, etag, variants)
+_variant_cache = {}
+
+
+def compute_etag(body):
+    """Strong ETag for the raw (identity) body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def build_variants(body):
+    """
+    Compress a body once with every available encoding
+
+    Args:
+        body (bytes): Raw response body
+
+    Returns:
+        dict: Mapping of encoding name to bytes, always including 'identity'.
+            Encodings that do not make the body smaller are left out.
+    """
+    variants = {'identity': body}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+
+    candidates = {'gzip': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        candidates['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    if zstandard is not None:
+        candidates['zstd'] = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+    for encoding, compressed in candidates.items():
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def get_variants(record):
+    """
+    Return (etag, variants) for a record, compressing only when its response changed
+
+    Templated responses are rendered per request and cannot be precompressed;
+    for those None is returned.
+
+    Args:
+        record (dict): Record with 'id', 'response' and 'updated_at'
+
+    Returns:
+        tuple: (etag, variants) or None for templated responses
+    """
+    version = record.get('updated_at')
+    cached = _variant_cache.get(record['id'])
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    compiled = compile_template(record.get('response'))
+    if not compiled.is_static:
+        return None
+
+    body = compiled.render()
+    etag = compute_etag(body)
+
+    # Reuse the variants compressed at write time when they match this body
+    from sql import get_encoded_variants
+    stored_etag, variants = get_encoded_variants(record['id'])
+    if stored_etag != etag:
+        variants = build_variants(body)
+    variants['identity'] = body
+
+    _variant_cache[record['id']] = (version, etag, variants)
+    return etag, variants
+
+
+def _parse_accept_encoding(accept_encoding):
+    """Parse an Accept-Encoding header into {encoding: q}"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding, variants):
+    """
+    Pick the best stored encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding (str): Request Accept-Encoding header (may be None)
+        variants (dict): Stored variants from build_variants()
+
+    Returns:
+        str: Chosen encoding, or None if nothing acceptable is stored (406)
+    """
+    accepted = _parse_accept_encoding(accept_encoding)
+    if not accepted:
+        return 'identity'
+
+    wildcard = accepted.get('*')
+    best = None
+    best_q = 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in variants:
+            continue
+        q = accepted.get(encoding)
+        if q is None:
+            # identity is acceptable unless explicitly refused (directly or via *;q=0)
+            if encoding == 'identity':
+                q = wildcard if wildcard is not None else 1.0
+            else:
+                q = wildcard if wildcard is not None else 0.0
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _parse_range(range_header, length):
+    """Parse a single 'bytes=start-end' range; returns (start, end), None to ignore, or False if unsatisfiable"""
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[6:].strip()
+    if "," in spec:
+        # Multipart ranges are not supported; serve the full body
+        return None
+    start, _, end = spec.partition("-")
+    try:
+        if start == "":
+            suffix = int(end)
+            if suffix <= 0:
+                return False
+            return max(0, length - suffix), length - 1
+        start = int(start)
+        end = int(end) if end else length - 1
+    except ValueError:
+        return None
+    if start >= length or end < start:
+        return False
+    return start, min(end, length - 1)
+
+
+def build_response(etag, variants, accept_encoding=None, if_none_match=None, range_header=None, if_range=None):
+    """
+    Serve a stored body with content negotiation, conditional GET and Range support
+
+    No compression happens here; the chosen variant is sliced from the stored bytes.
+
+    Args:
+        etag (str): ETag of the identity body
+        variants (dict): Stored variants from build_variants()
+        accept_encoding (str, optional): Request Accept-Encoding header
+        if_none_match (str, optional): Request If-None-Match header
+        range_header (str, optional): Request Range header
+        if_range (str, optional): Request If-Range header
+
+    Returns:
+        tuple: (status_code, headers dict, body bytes)
+    """
+    encoding = negotiate_encoding(accept_encoding, variants)
+    if encoding is None:
+        return 406, {'Vary': 'Accept-Encoding'}, b""
+
+    # Each encoded representation needs its own validator
+    variant_etag = etag if encoding == 'identity' else etag[:-1] + '-' + encoding + '"'
+    headers = {
+        'ETag': variant_etag,
+        'Vary': 'Accept-Encoding',
+        'Accept-Ranges': 'bytes',
+    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if '*' in tags or variant_etag in tags or ('W/' + variant_etag) in tags:
+            return 304, headers, b""
+
+    body = variants[encoding]
+    length = len(body)
+
+    if range_header and (if_range is None or if_range == variant_etag):
+        byte_range = _parse_range(range_header, length)
+        if byte_range is False:
+            headers['Content-Range'] = f"bytes */{length}"
+            return 416, headers, b""
+        if byte_range:
+            start, end = byte_range
+            headers['Content-Range'] = f"bytes {start}-{end}/{length}"
+            headers['Content-Length'] = str(end - start + 1)
+            return 206, headers, body[start:end + 1]
+
+    headers['Content-Length'] = str(length)
+    return 200, headers, body
+
+
+def precompress_record(record_id, response, environment=None):
+    """
+    Compress a freshly written response and store the variants next to the record
+
+    Skipped when the stored variants already match the body's ETag, so a refresh
+    that returned the same response costs one hash and one lookup.
+
+    Args:
+        record_id (int): Record ID
+        response: The stored response (JSON text, dict or list)
+        environment (str, optional): The record's environment
+
+    Returns:
+        bool: True if variants were stored, already current, or the response is templated; False on failure
+    """
+    from sql import get_encoded_etag, store_encoded_variants
+
+    if isinstance(response, (str, bytes)):
+        # Match the form the json column is read back in, so the ETag stays stable
+        try:
+            response = json.loads(response)
+        except ValueError:
+            pass
+    compiled = compile_template(response)
+    stored_etag = get_encoded_etag(record_id)
+    if not compiled.is_static:
+        if stored_etag is None:
+            return True
+        # Rendered per request; drop any variants from a previous static version
+        return store_encoded_variants(record_id, None, {}, environment=environment)
+
+    body = compiled.render()
+    etag = compute_etag(body)
+    if etag == stored_etag:
+        return True
+
+    variants = build_variants(body)
+    # identity is served from the record itself
+    variants.pop('identity', None)
+    if not variants and stored_etag is None:
+        return True
+    return store_encoded_variants(record_id, etag, variants, environment=environment)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def precompress_in_background(record_id, response, environment=None):
+    """
+    Run precompress_record() on a worker thread so UI handlers do not block on compression
+
+    Until it finishes, get_variants() compresses on demand as before.
+
+    Returns:
+        Future: Resolves to precompress_record()'s result
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="precompress")
+    return _executor.submit(precompress_record, record_id, response, environment)
@@ -0,0 +1,136 @@
+import json
+import difflib
+import threading
+from datetime import datetime
+from urllib.parse import urlparse, urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import codec
+
+
+REQUEST_TIMEOUT = 30
+MAX_PARALLEL = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Shared requests.Session with a connection pool sized for parallel validation"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_PARALLEL, pool_maxsize=MAX_PARALLEL)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def build_target_urls(url, base_urls):
+    """
+    Apply the path and query of a request URL to several environment base URLs
+
+    Args:
+        url (str): The request URL (or just a path) entered once
+        base_urls (dict): Environment name -> base URL, e.g. {'Dev': 'https://dev.example.com'}
+
+    Returns:
+        dict: Environment name -> full target URL
+    """
+    parsed = urlparse(url)
+    path = parsed.path or "/"
+    if parsed.query:
+        path += f"?{parsed.query}"
+    return {
+        environment: urljoin(base_url.rstrip("/") + "/", path.lstrip("/"))
+        for environment, base_url in base_urls.items()
+        if base_url
+    }
+
+
+def _send(method, url, headers, params, body_type, body_data):
+    session = get_http_session()
+    kwargs = {'headers': headers, 'params': params, 'timeout': REQUEST_TIMEOUT}
+    if method in ("POST", "PUT", "PATCH"):
+        if body_type == "JSON" and body_data:
+            kwargs['json'] = body_data
+        else:
+            kwargs['data'] = body_data
+
+    start_time = datetime.now()
+    try:
+        response = session.request(method, url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        return {'url': url, 'error': str(e), 'success': False}
+    response_time = (datetime.now() - start_time).total_seconds() * 1000
+
+    try:
+        json_response = codec.loads(response.content)
+        response_text = response.content.decode("utf-8", errors="replace")
+    except ValueError:
+        json_response = None
+        response_text = codec.dumps(response.text)
+
+    return {
+        'url': url,
+        'status_code': response.status_code,
+        'response_time': response_time,
+        'content_length': len(response.content),
+        'json': json_response,
+        'text': response.text,
+        # JSON text ready to be stored as the mock response
+        'validated_response': response_text,
+        'success': 200 <= response.status_code < 300,
+    }
+
+
+def validate_targets(method, targets, headers=None, params=None, body_type="None", body_data=None):
+    """
+    Send the same request to every target concurrently over the pooled session
+
+    Args:
+        method (str): HTTP method
+        targets (dict): Environment name -> URL, from build_target_urls()
+        headers (dict, optional): Request headers
+        params (dict, optional): Query parameters
+        body_type (str, optional): 'None', 'JSON', 'Form Data' or 'Raw Text'
+        body_data (optional): Request body
+
+    Returns:
+        dict: Environment name -> result dict (status_code, response_time, json, text, ... or error)
+    """
+    if not targets:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL, len(targets))) as executor:
+        futures = {
+            environment: executor.submit(_send, method, target_url, headers or {}, params or {}, body_type, body_data)
+            for environment, target_url in targets.items()
+        }
+        return {environment: future.result() for environment, future in futures.items()}
+
+
+def _comparable_lines(result):
+    if result.get('json') is not None:
+        # Sorted keys so key order differences between environments do not show up
+        return json.dumps(result['json'], indent=2, sort_keys=True).splitlines()
+    return (result.get('text') or result.get('error') or "").splitlines()
+
+
+def diff_results(baseline_name, baseline, other_name, other):
+    """
+    Unified diff of two environments' response bodies
+
+    Returns:
+        str: The diff, or an empty string if the bodies are equal
+    """
+    return "\n".join(difflib.unified_diff(
+        _comparable_lines(baseline),
+        _comparable_lines(other),
+        fromfile=baseline_name,
+        tofile=other_name,
+        lineterm=""
+    ))
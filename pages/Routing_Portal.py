@@ -7,7 +7,10 @@ import sys
 import os
 import base64
 
-from sql import get_url_data, connect_to_retool, delete_response
+from sql import connect_to_retool, delete_response, bulk_clear_responses, bulk_delete_records, bulk_update_environment_lob, get_url_data_by_ids
+from profiling import phase, profile_session
+from refresh_worker import get_refresh_worker, QUEUED, RUNNING, DONE
+from search_index import search_catalog, invalidate_trigram_index
 
 
 
@@ -17,8 +20,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# Opt-in (SV_PROFILE=1) per-phase timings for this page load; the with block also
+# closes the session when st.rerun() or st.stop() ends the script early
+with profile_session("routing-portal"):
 
-st.markdown("""
+
+    st.markdown("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -51,114 +58,295 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-st.image("src/ValueMomentum_logo.png", width=100)
+    st.image("src/ValueMomentum_logo.png", width=100)
     
-st.write("")
+    st.write("")
 
-st.markdown('<div class="main-header">API Data</div>', unsafe_allow_html=True)
+    st.markdown('<div class="main-header">API Data</div>', unsafe_allow_html=True)
 
 
-# Main content
-st.subheader(" Mock API Database Records")
+    PAGE_SIZE = 50
 
 
-try:
-    with st.spinner("Loading data from database..."):
-        url_data = get_url_data()
+    # Records created from the Command Center show up here after at most CATALOG_TTL
+    # seconds; changes made on this page invalidate the cache immediately
+    CATALOG_TTL = 15
 
-    if url_data:
-        st.success(f"Found {len(url_data)} records in the database")
 
-        # Convert to DataFrame for better display
-        df = pd.DataFrame(url_data)
+    @st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+    def load_catalog_page(query, page):
+        """One page of ranked search results, cached so widget interactions do not reload it"""
+        result = search_catalog(query, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+        if result is None:
+            # Raised rather than returned so a failed search is not cached
+            raise RuntimeError("Catalog search failed")
+        return result
 
-        # Format the created_at column to IST
-        if 'created_at' in df.columns:
-            df['created_at'] = pd.to_datetime(df['created_at']).dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata').dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Format the updated_at column to IST
-        if 'updated_at' in df.columns:
-            df['updated_at'] = pd.to_datetime(df['updated_at']).dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata').dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    def reset_catalog_page():
+        """Go back to page 1, e.g. when the search query changes"""
+        st.session_state.catalog_page = 1
+
+
+    def invalidate_catalog():
+        """Drop cached pages and the in-process search index after records changed"""
+        load_catalog_page.clear()
+        invalidate_trigram_index()
+
+
+    def run_bulk_action(action, ids, environment=None, lob=None):
+        """Run a bulk action on the selected records; returns (ok, message)"""
+        if action == "Clear response":
+            affected = bulk_clear_responses(ids)
+            if affected is None:
+                return False, f"Failed to clear responses for {len(ids)} selected records"
+            return True, f"Cleared responses for {affected} records"
+        if action == "Delete record":
+            affected = bulk_delete_records(ids)
+            if affected is None:
+                return False, f"Failed to delete {len(ids)} selected records"
+            return True, f"Deleted {affected} records"
+        if action == "Change environment/LOB":
+            affected = bulk_update_environment_lob(ids, environment=environment, lob=lob)
+            if affected is None:
+                return False, f"Failed to update environment/LOB for {len(ids)} selected records"
+            return True, f"Updated environment/LOB for {affected} records"
+        if action == "Refresh now":
+            records = get_url_data_by_ids(ids)
+            if not records:
+                return False, "Failed to load the selected records for refresh"
+            # Runs in the background worker pool; progress is shown by refresh_progress()
+            submitted = get_refresh_worker().submit(records)
+            st.session_state.refresh_ids = submitted
+            st.session_state.refresh_results = None
+            return True, f"Refreshing {len(submitted)} records in the background"
+        return False, f"Unknown action: {action}"
+
+
+    def render_refresh_table(progress):
+        """Per-record state, status, latency and error of a background refresh"""
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'id': record_id,
+                    'state': status['state'],
+                    'status_code': status.get('status_code'),
+                    'latency_ms': round(status['response_time']) if status.get('response_time') is not None else None,
+                    'error': status.get('error'),
+                }
+                for record_id, status in progress.items()
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+    @st.fragment(run_every=1)
+    def refresh_progress():
+        """Poll the background refresh and stream per-record progress without rerunning the page"""
+        refresh_ids = st.session_state.get('refresh_ids')
+        if not refresh_ids:
+            return
+
+        worker = get_refresh_worker()
+        # Checked before reading progress so a finished snapshot is final
+        done = worker.is_finished(refresh_ids)
+        progress = worker.progress(refresh_ids)
+        finished = sum(1 for status in progress.values() if status['state'] not in (QUEUED, RUNNING))
+
+        st.progress(finished / len(refresh_ids), text=f"Refreshed {finished}/{len(refresh_ids)} records")
+        render_refresh_table(progress)
+
+        if done:
+            # Kept so the results stay visible after the rerun unmounts this fragment
+            st.session_state.refresh_results = progress
+            st.session_state.refresh_ids = None
+            # One catalog reload once every selected record is done
+            invalidate_catalog()
+            st.rerun()
+
+
+    def refresh_results():
+        """Final result of the last background refresh, shown until dismissed"""
+        progress = st.session_state.get('refresh_results')
+        if not progress:
+            return
+
+        failed = sum(1 for status in progress.values() if status['state'] != DONE)
+        summary = f"Refresh finished: {len(progress) - failed}/{len(progress)} records refreshed"
+        if failed:
+            st.warning(f"{summary}, {failed} failed or skipped")
+        else:
+            st.success(summary)
+        render_refresh_table(progress)
+        if st.button("Dismiss refresh results"):
+            st.session_state.refresh_results = None
+            st.rerun()
+
+
+    # Main content
+    st.subheader(" Mock API Database Records")
+
+
+    try:
+        search_cols = st.columns([4, 1])
+        with search_cols[0]:
+            # A new search starts from the first page
+            search_query = st.text_input(
+                "Search",
+                placeholder="Search by name, description, original URL or routing URL",
+                on_change=reset_catalog_page
+            ).strip()
+        with search_cols[1]:
+            page = st.number_input("Page", min_value=1, step=1, key="catalog_page")
+
+        with st.spinner("Loading data from database..."):
+            url_data, has_next_page = load_catalog_page(search_query, int(page))
+
+        if url_data:
+            first_record = (int(page) - 1) * PAGE_SIZE + 1
+            more = ", more on the next page" if has_next_page else ""
+            st.success(f"Showing records {first_record}-{first_record + len(url_data) - 1} (page {int(page)}{more})")
+
+            # Bulk actions run as one set-based statement, then reload the catalog once
+            with st.expander("Bulk Actions"):
+                with st.form("bulk_actions_form"):
+                    record_labels = {record['id']: f"{record['id']} - {record.get('name') or 'Unnamed'} ({record.get('environment')})" for record in url_data}
+                    selected_ids = st.multiselect("Records", options=list(record_labels), format_func=record_labels.get)
+                    action = st.selectbox("Action", ["Clear response", "Delete record", "Change environment/LOB", "Refresh now"])
+                    target_cols = st.columns(2)
+                    with target_cols[0]:
+                        target_environment = st.selectbox("New Environment", ["Unchanged", "Dev", "Test", "Staging", "Prod"])
+                    with target_cols[1]:
+                        target_lob = st.selectbox("New Line of Business", ["Unchanged", "Policy", "Claims", "Small Business"])
+                    apply_clicked = st.form_submit_button("Apply", type="primary")
+
+                if apply_clicked:
+                    if not selected_ids:
+                        st.warning("Select at least one record")
+                    else:
+                        ok, message = run_bulk_action(
+                            action,
+                            [int(record_id) for record_id in selected_ids],
+                            environment=None if target_environment == "Unchanged" else target_environment,
+                            lob=None if target_lob == "Unchanged" else target_lob
+                        )
+                        if action == "Refresh now":
+                            # The progress fragment invalidates the catalog when the refresh completes
+                            if ok:
+                                st.info(message)
+                            else:
+                                st.error(message)
+                        else:
+                            # Partial failures may still have changed rows, so always invalidate
+                            invalidate_catalog()
+                            if ok:
+                                st.success(message)
+                                st.rerun()
+                            else:
+                                st.error(message)
+
+                # The fragment reruns every second while mounted, so only mount it during a refresh
+                if st.session_state.get('refresh_ids'):
+                    refresh_progress()
+                else:
+                    refresh_results()
+
+            with phase("dataframe"):
+                # Convert to DataFrame for better display
+                df = pd.DataFrame(url_data)
+
+                # Format the created_at column to IST
+                if 'created_at' in df.columns:
+                    df['created_at'] = pd.to_datetime(df['created_at']).dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata').dt.strftime('%Y-%m-%d %H:%M:%S')
+            
+                # Format the updated_at column to IST
+                if 'updated_at' in df.columns:
+                    df['updated_at'] = pd.to_datetime(df['updated_at']).dt.tz_localize('UTC').dt.tz_convert('Asia/Kolkata').dt.strftime('%Y-%m-%d %H:%M:%S')
         
-        # Display records as table with delete buttons
-        st.subheader("All Records - Table View")
+            # Display records as table with delete buttons
+            st.subheader("Search Results - Table View" if search_query else "All Records - Table View")
         
-        # Create table headers
-        header_cols = st.columns([1, 2, 1, 2, 3, 2, 2, 1, 1])
-        with header_cols[0]:
-            st.write("**ID**")
-        with header_cols[1]:
-            st.write("**Name**")
-        with header_cols[2]:
-            st.write("**Method**")
-        with header_cols[3]:
-            st.write("**Routing URL**")
-        with header_cols[4]:
-            st.write("**Original URL**")
-        with header_cols[5]:
-            st.write("**LOB**")
-        with header_cols[6]:
-            st.write("**Environment**")
-        with header_cols[7]:
-            st.write("**Created At**")
-        with header_cols[8]:
-            st.write("**Action**")
+            # Create table headers
+            header_cols = st.columns([1, 2, 1, 2, 3, 2, 2, 1, 1])
+            with header_cols[0]:
+                st.write("**ID**")
+            with header_cols[1]:
+                st.write("**Name**")
+            with header_cols[2]:
+                st.write("**Method**")
+            with header_cols[3]:
+                st.write("**Routing URL**")
+            with header_cols[4]:
+                st.write("**Original URL**")
+            with header_cols[5]:
+                st.write("**LOB**")
+            with header_cols[6]:
+                st.write("**Environment**")
+            with header_cols[7]:
+                st.write("**Created At**")
+            with header_cols[8]:
+                st.write("**Action**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        # Display data rows
-        for index, row in df.iterrows():
-            data_cols = st.columns([1, 2, 1, 2, 3, 2, 2, 1, 1])
+            with phase("render_table"):
+                # Display data rows
+                for index, row in df.iterrows():
+                    data_cols = st.columns([1, 2, 1, 2, 3, 2, 2, 1, 1])
             
-            with data_cols[0]:
-                st.write(row['id'])
-            with data_cols[1]:
-                name = row.get('name', 'N/A')
-                description = row.get('description', '')
-                if description:
-                    st.markdown(f'<span title="{description}" style="cursor:help;border-bottom:1px dotted #666;">{name}</span>', unsafe_allow_html=True)
-                else:
-                    st.write(name)
-            with data_cols[2]:
-                st.write(row.get('operation', 'N/A'))
-            with data_cols[3]:
-                routing_url = f"https://routing-portal-d3id.vercel.app/route?routing_url={row.get('routing_url', '')}"
-                st.write(routing_url)
-            with data_cols[4]:
-                st.write(row['original_url'])
-            with data_cols[5]:
-                st.write(row.get('lob', 'N/A'))
-            with data_cols[6]:
-                st.write(row.get('environment', 'N/A'))
-            with data_cols[7]:
-                st.write(row.get('created_at', 'N/A'))
-            with data_cols[8]:
-                if st.button("Delete", key=f"delete_{row['id']}", type="secondary"):
-                    if delete_response(row['id']):
-                        st.success(f"Response deleted for record {row['id']}")
-                        st.rerun()
-                    else:
-                        st.error(f"Failed to delete response for record {row['id']}")
+                    with data_cols[0]:
+                        st.write(row['id'])
+                    with data_cols[1]:
+                        name = row.get('name', 'N/A')
+                        description = row.get('description', '')
+                        if description:
+                            st.markdown(f'<span title="{description}" style="cursor:help;border-bottom:1px dotted #666;">{name}</span>', unsafe_allow_html=True)
+                        else:
+                            st.write(name)
+                    with data_cols[2]:
+                        st.write(row.get('operation', 'N/A'))
+                    with data_cols[3]:
+                        routing_url = f"https://routing-portal-d3id.vercel.app/route?routing_url={row.get('routing_url', '')}"
+                        st.write(routing_url)
+                    with data_cols[4]:
+                        st.write(row['original_url'])
+                    with data_cols[5]:
+                        st.write(row.get('lob', 'N/A'))
+                    with data_cols[6]:
+                        st.write(row.get('environment', 'N/A'))
+                    with data_cols[7]:
+                        st.write(row.get('created_at', 'N/A'))
+                    with data_cols[8]:
+                        if st.button("Delete", key=f"delete_{row['id']}", type="secondary"):
+                            if delete_response(int(row['id']), environment=row.get('environment')):
+                                invalidate_catalog()
+                                st.success(f"Response deleted for record {row['id']}")
+                                st.rerun()
+                            else:
+                                st.error(f"Failed to delete response for record {row['id']}")
 
        
-    else:
-        st.info("No records found in the service_virtualisation database")
-        st.write("Register the APIs to create mock APIs first.")
+        elif search_query or int(page) > 1:
+            st.info("No records match this search")
+        else:
+            st.info("No records found in the service_virtualisation database")
+            st.write("Register the APIs to create mock APIs first.")
 
-except Exception as e:
-    st.error(f"Error connecting to database: {str(e)}")
-    st.write("Please check your database connection in sql.py")
+    except Exception as e:
+        st.error(f"Error connecting to database: {str(e)}")
+        st.write("Please check your database connection in sql.py")
     
-    # Show connection test button
-    if st.button("Test Database Connection"):
-        try:
-            conn = connect_to_retool()
-            conn.close()
-            st.success("Database connection successful!")
-        except Exception as conn_error:
-            st.error(f"Database connection failed: {str(conn_error)}")
-
-
-# Footer
-st.markdown("---")
-st.markdown("© 2026 ValueMomentum. All Rights Reserved.")
\ No newline at end of file
+        # Show connection test button
+        if st.button("Test Database Connection"):
+            try:
+                conn = connect_to_retool()
+                conn.close()
+                st.success("Database connection successful!")
+            except Exception as conn_error:
+                st.error(f"Database connection failed: {str(conn_error)}")
+
+
+    # Footer
+    st.markdown("---")
+    st.markdown("© 2026 ValueMomentum. All Rights Reserved.")
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+
+# Opt-in switches, read once at import:
+#   SV_PROFILE=1              per-phase timers, written per scheduler cycle / page load
+#   SV_PROFILE_CPROFILE=1     also capture a cProfile .prof file
+#   SV_PROFILE_TRACEMALLOC=1  also capture the top allocation sites
+#   SV_PROFILE_DIR=profiles   output directory
+PROFILE_ENABLED = os.environ.get("SV_PROFILE", "") not in ("", "0", "false", "False")
+CPROFILE_ENABLED = PROFILE_ENABLED and os.environ.get("SV_PROFILE_CPROFILE", "") not in ("", "0", "false", "False")
+TRACEMALLOC_ENABLED = PROFILE_ENABLED and os.environ.get("SV_PROFILE_TRACEMALLOC", "") not in ("", "0", "false", "False")
+PROFILE_DIR = os.environ.get("SV_PROFILE_DIR", "profiles")
+
+TRACEMALLOC_TOP = 20
+
+# Streamlit runs each session's script in its own thread, so sessions are per thread
+_local = threading.local()
+
+
+class ProfileSession:
+    """Per-phase timings for one scheduler cycle or page load"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        # Folded stack ("label;outer;inner") -> [total seconds, calls]
+        self.phases = {}
+        self.stack = [label]
+        self.profiler = None
+        self.start_snapshot = None
+
+    def add(self, stack_key, elapsed):
+        totals = self.phases.setdefault(stack_key, [0.0, 0])
+        totals[0] += elapsed
+        totals[1] += 1
+
+
+def enabled():
+    return PROFILE_ENABLED
+
+
+def current_session():
+    return getattr(_local, "session", None)
+
+
+def start_session(label):
+    """
+    Start profiling a scheduler cycle or page load
+
+    Args:
+        label (str): Name used in output file names and as the flamegraph root
+
+    Returns:
+        ProfileSession: The session, or None when profiling is disabled
+    """
+    if not PROFILE_ENABLED:
+        return None
+
+    session = ProfileSession(label)
+    if CPROFILE_ENABLED:
+        import cProfile
+        session.profiler = cProfile.Profile()
+        session.profiler.enable()
+    if TRACEMALLOC_ENABLED:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # Diffed in finish_session() so the report covers this session, not the process so far
+        session.start_snapshot = tracemalloc.take_snapshot()
+    _local.session = session
+    return session
+
+
+def finish_session(session):
+    """
+    Stop a session and write its outputs to PROFILE_DIR
+
+    Writes <label>-<timestamp>.json (per-phase breakdown), .folded (flamegraph.pl /
+    speedscope compatible stacks in microseconds) and, when enabled, .prof (cProfile).
+
+    Args:
+        session (ProfileSession): Session from start_session(); None is ignored
+
+    Returns:
+        str: Path prefix of the written files, or None
+    """
+    if session is None:
+        return None
+    if getattr(_local, "session", None) is session:
+        _local.session = None
+
+    total = time.perf_counter() - session.start
+    if session.profiler is not None:
+        session.profiler.disable()
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prefix = os.path.join(PROFILE_DIR, f"{session.label}-{session.started_at.strftime('%Y%m%d-%H%M%S-%f')}")
+
+        breakdown = {
+            "label": session.label,
+            "started_at": session.started_at.isoformat(),
+            "total_ms": round(total * 1000, 3),
+            "phases": {
+                stack_key: {"total_ms": round(seconds * 1000, 3), "calls": calls}
+                for stack_key, (seconds, calls) in sorted(session.phases.items(), key=lambda item: -item[1][0])
+            },
+        }
+
+        if TRACEMALLOC_ENABLED and session.start_snapshot is not None:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                # Growth since start_session(); other threads' allocations in that window are included
+                snapshot = tracemalloc.take_snapshot()
+                breakdown["top_allocations"] = [
+                    {"site": str(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                    for stat in snapshot.compare_to(session.start_snapshot, "lineno")[:TRACEMALLOC_TOP]
+                ]
+
+        with open(prefix + ".json", "w", encoding="utf-8") as breakdown_file:
+            json.dump(breakdown, breakdown_file, indent=2)
+
+        # Folded stacks need self time: subtract time spent in nested phases
+        self_time = {stack_key: seconds for stack_key, (seconds, _) in session.phases.items()}
+        for stack_key, (seconds, _) in session.phases.items():
+            parent = stack_key.rsplit(";", 1)[0]
+            if parent in self_time:
+                self_time[parent] -= seconds
+        untracked = total - sum(seconds for stack_key, (seconds, _) in session.phases.items() if stack_key.count(";") == 1)
+        with open(prefix + ".folded", "w", encoding="utf-8") as folded_file:
+            for stack_key, seconds in self_time.items():
+                folded_file.write(f"{stack_key} {max(0, int(seconds * 1_000_000))}\n")
+            folded_file.write(f"{session.label} {max(0, int(untracked * 1_000_000))}\n")
+
+        if session.profiler is not None:
+            session.profiler.dump_stats(prefix + ".prof")
+
+        return prefix
+
+    except OSError as e:
+        print(f"Error writing profile: {e}")
+        return None
+
+
+@contextmanager
+def profile_session(label):
+    """Context manager around start_session() / finish_session()"""
+    session = start_session(label)
+    try:
+        yield session
+    finally:
+        finish_session(session)
+
+
+@contextmanager
+def phase(name):
+    """Time a block as a named phase of the current session (no-op when disabled)"""
+    session = current_session() if PROFILE_ENABLED else None
+    if session is None:
+        yield
+        return
+
+    session.stack.append(name)
+    stack_key = ";".join(session.stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        session.add(stack_key, time.perf_counter() - start)
+        session.stack.pop()
+
+
+def timed(name):
+    """Decorator timing every call of a function as a phase"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILE_ENABLED:
+                return func(*args, **kwargs)
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name, iterable):
+    """Time each step of an iterator (e.g. a streaming DB scan) as a phase"""
+    if not PROFILE_ENABLED:
+        yield from iterable
+        return
+
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
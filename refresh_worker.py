@@ -0,0 +1,111 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from circuit_breaker import host_of
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class RefreshWorker:
+    """
+    Background pool refreshing mocks on demand with the scheduler's hit_original_url
+
+    Refreshes of a record that is already queued or running are collapsed into the
+    in-flight call, so concurrent requests cause a single upstream hit. Calls go
+    through the scheduler's host_guard, so portal refreshes share its per-host rate
+    limits and circuit breakers.
+    """
+
+    def __init__(self, max_workers=8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mock-refresh")
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.status = {}
+
+    def submit(self, records):
+        """
+        Queue records for refresh without blocking
+
+        Args:
+            records (list): Records with at least id, original_url, operation, headers, parameters
+
+        Returns:
+            list: IDs of the submitted records
+        """
+        ids = []
+        with self.lock:
+            for record in records:
+                record_id = record['id']
+                ids.append(record_id)
+                if record_id in self.in_flight:
+                    continue
+                self.status[record_id] = {'state': QUEUED, 'queued_at': time.time()}
+                self.in_flight[record_id] = self.executor.submit(self._refresh, record)
+        return ids
+
+    def _refresh(self, record):
+        # Imported here so the worker can be created without pulling in requests
+        from scheduler import hit_original_url, host_guard
+
+        record_id = record['id']
+        with self.lock:
+            self.status[record_id] = {**self.status.get(record_id, {}), 'state': RUNNING, 'started_at': time.time()}
+
+        try:
+            result = self._guarded_hit(record, hit_original_url, host_guard)
+        except Exception as e:
+            result = {'id': record_id, 'error': str(e), 'success': False}
+
+        with self.lock:
+            self.status[record_id] = {
+                **self.status.get(record_id, {}),
+                'state': DONE if result.get('success') else FAILED,
+                'status_code': result.get('status_code'),
+                'response_time': result.get('response_time'),
+                'error': result.get('error'),
+                'finished_at': time.time(),
+            }
+            self.in_flight.pop(record_id, None)
+        return result
+
+    def _guarded_hit(self, record, hit_original_url, host_guard):
+        """Call hit_original_url behind the scheduler's per-host rate limit and circuit breaker"""
+        host = host_of(record['original_url'])
+        wait, allowed = host_guard.try_acquire(host)
+        while wait:
+            time.sleep(wait)
+            wait, allowed = host_guard.try_acquire(host)
+        if not allowed:
+            return {'id': record['id'], 'error': f"Circuit open for {host}, refresh skipped", 'success': False}
+
+        result = hit_original_url(record)
+        host_guard.record_result(host, result)
+        return result
+
+    def progress(self, ids):
+        """Current status for each of the given record IDs"""
+        with self.lock:
+            return {record_id: dict(self.status.get(record_id, {'state': QUEUED})) for record_id in ids}
+
+    def is_finished(self, ids):
+        """True once none of the given records is queued or running"""
+        with self.lock:
+            return not any(record_id in self.in_flight for record_id in ids)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_refresh_worker(max_workers=8):
+    """Process-wide RefreshWorker, shared by every portal session"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = RefreshWorker(max_workers=max_workers)
+        return _worker
@@ -1,76 +1,98 @@
 import schedule
 import time
 import requests
-import json
 import logging
 from datetime import datetime
-from sql import connect_to_retool, get_url_data, update_mock_data
+from sql import connect_to_retool, scan_url_data, update_mock_data
+from codec import decode_record_field, response_to_json_text
+from circuit_breaker import HostGuard, host_of
+from compression import precompress_record
+from profiling import phase, timed, timed_iter, start_session, finish_session
 # from wiremock import update_wiremock
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scheduler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-
-def hit_original_url(record):
+
+def configure_logging():
+    """Log to scheduler.log and the console; only for the scheduler process, not importers like the portal"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('scheduler.log', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+# Upstream request timeout in seconds (capped by the remaining cycle budget)
+REQUEST_TIMEOUT = 30
+
+# Fraction of the schedule interval a cycle may use before deferring records
+CYCLE_DEADLINE_FRACTION = 0.75
+
+# Below this many seconds left in the cycle, remaining records are deferred
+MIN_REQUEST_BUDGET = 2
+
+# Per-host circuit breakers and rate limits, kept across cycles
+host_guard = HostGuard(failure_threshold=3, reset_timeout=300, half_open_probes=1, rate_per_second=5, burst=5)
+
+# Last record id reached before the deadline; the next cycle starts after it
+_resume_after_id = None
+
+
+@timed("hit_original_url")
+def hit_original_url(record, timeout=REQUEST_TIMEOUT):
     """Hit the original URL with stored headers and parameters"""
     try:
         url = record['original_url']
         operation = record.get('operation', 'GET')
         
-        # Parse headers and parameters from JSON
+        # Parse headers and parameters from JSON (cached by value across cycles)
         headers = {}
         params = {}
         
-        if record.get('headers'):
+        with phase("json"):
             try:
-                if isinstance(record['headers'], str):
-                    headers = json.loads(record['headers'])
-                else:
-                    headers = record['headers']
-            except (json.JSONDecodeError, TypeError):
+                headers = decode_record_field(record, 'headers')
+            except (ValueError, TypeError):
                 logging.warning(f"Invalid headers JSON for record {record['id']}")
-        
-        if record.get('parameters'):
+            
             try:
-                if isinstance(record['parameters'], str):
-                    params = json.loads(record['parameters'])
-                else:
-                    params = record['parameters']
-            except (json.JSONDecodeError, TypeError):
+                params = decode_record_field(record, 'parameters')
+            except (ValueError, TypeError):
                 logging.warning(f"Invalid parameters JSON for record {record['id']}")
         
         # Make the request
         start_time = datetime.now()
         
-        if operation.upper() == 'GET':
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-        elif operation.upper() == 'POST':
-            response = requests.post(url, headers=headers, params=params, timeout=30)
-        elif operation.upper() == 'PUT':
-            response = requests.put(url, headers=headers, params=params, timeout=30)
-        elif operation.upper() == 'DELETE':
-            response = requests.delete(url, headers=headers, params=params, timeout=30)
-        else:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+        with phase("http"):
+            if operation.upper() == 'GET':
+                response = requests.get(url, headers=headers, params=params, timeout=timeout)
+            elif operation.upper() == 'POST':
+                response = requests.post(url, headers=headers, params=params, timeout=timeout)
+            elif operation.upper() == 'PUT':
+                response = requests.put(url, headers=headers, params=params, timeout=timeout)
+            elif operation.upper() == 'DELETE':
+                response = requests.delete(url, headers=headers, params=params, timeout=timeout)
+            else:
+                response = requests.get(url, headers=headers, params=params, timeout=timeout)
         
         end_time = datetime.now()
         response_time = (end_time - start_time).total_seconds() * 1000
         
         logging.info(f"Record {record['id']}: {operation} {url} - Status: {response.status_code}, Time: {response_time:.0f}ms")
         
-        # Update mock data with new response
-        try:
-            updated_response = response.json()
-        except:
-            updated_response = response.text
+        # Update mock data with new response, passing valid JSON bytes straight through
+        with phase("json"):
+            updated_response = response_to_json_text(response)
             
-        status = update_mock_data(record['id'], updated_response)
+        status = update_mock_data(record['id'], updated_response, environment=record.get('environment'))
+        if status:
+            # The upstream call already succeeded; a compression failure must not count against the host
+            try:
+                with phase("precompress"):
+                    precompress_record(record['id'], updated_response, environment=record.get('environment'))
+            except Exception as e:
+                logging.error(f"Record {record['id']}: Precompression failed - {str(e)}")
         
         return {
             'id': record['id'],
@@ -94,52 +116,120 @@ def hit_original_url(record):
             'success': False
         }
 
-def scheduled_health_check():
-    """Main scheduler function to check all URLs"""
+def _scan_from_resume_point():
+    """Stream records starting after the id the previous cycle stopped at, then wrap around"""
+    if _resume_after_id is None:
+        yield from scan_url_data()
+        return
+    yield from scan_url_data(after_id=_resume_after_id)
+    yield from scan_url_data(until_id=_resume_after_id)
+
+
+def scheduled_health_check(deadline_seconds=None):
+    """
+    Main scheduler function to check all URLs
+
+    Args:
+        deadline_seconds (float, optional): Time budget for the cycle. Records not
+            reached in time are deferred to the next cycle, which resumes after the
+            last record checked.
+    """
+    global _resume_after_id
     logging.info("Starting scheduled health check...")
     
+    cycle_start = time.monotonic()
+    profile = start_session("scheduler-cycle")
+    last_checked_id = _resume_after_id
+    
     try:
-        # Get all records from database
-        records = get_url_data()
-        
-        if not records:
-            logging.info("No records found in database")
-            return
-        
-        logging.info(f"Found {len(records)} records to check")
-        
-        results = []
+        # Stream records from the database instead of loading the whole catalog
+        record_count = 0
         success_count = 0
+        failed_ids = []
+        skipped_ids = []
+        deferred = False
         
-        for record in records:
-            if record.get('original_url'):
-                result = hit_original_url(record)
-                results.append(result)
-                if result.get('success'):
-                    success_count += 1
-            else:
+        for record in timed_iter("scan_url_data", _scan_from_resume_point()):
+            record_count += 1
+            if not record.get('original_url'):
                 logging.warning(f"Record {record['id']}: No original URL found")
+                continue
+            
+            remaining = None
+            if deadline_seconds is not None:
+                remaining = deadline_seconds - (time.monotonic() - cycle_start)
+                if remaining < MIN_REQUEST_BUDGET:
+                    deferred = True
+                    break
+            
+            host = host_of(record['original_url'])
+            wait, allowed = host_guard.try_acquire(host)
+            while wait:
+                if remaining is not None and wait > remaining - MIN_REQUEST_BUDGET:
+                    deferred = True
+                    break
+                time.sleep(wait)
+                if remaining is not None:
+                    remaining -= wait
+                wait, allowed = host_guard.try_acquire(host)
+            if deferred:
+                break
+            
+            if not allowed:
+                skipped_ids.append(record['id'])
+                last_checked_id = record['id']
+                continue
+            
+            timeout = REQUEST_TIMEOUT if remaining is None else min(REQUEST_TIMEOUT, remaining)
+            result = hit_original_url(record, timeout=timeout)
+            last_checked_id = record['id']
+            host_guard.record_result(host, result)
+            
+            if result.get('success'):
+                success_count += 1
+            else:
+                failed_ids.append(result['id'])
+        
+        _resume_after_id = last_checked_id if deferred else None
+        
+        if not record_count:
+            logging.info("No records found in database")
+            return
         
-        logging.info(f"Health check completed: {success_count}/{len(records)} successful")
+        logging.info(f"Health check completed: {success_count}/{record_count} successful")
         
         # Log summary
-        failed_records = [r for r in results if not r.get('success')]
-        if failed_records:
-            logging.warning(f"Failed records: {[r['id'] for r in failed_records]}")
+        if failed_ids:
+            logging.warning(f"Failed records: {failed_ids}")
+        if skipped_ids:
+            logging.warning(f"Skipped records (circuit open for {host_guard.open_hosts()}): {skipped_ids}")
+        if deferred:
+            logging.warning(f"Cycle deadline of {deadline_seconds:.0f}s reached, deferring records after ID {_resume_after_id} to the next cycle")
         
     except Exception as e:
-        logging.error(f"Scheduler error: {str(e)}")
+        # Keep the resume point so a failed scan is retried instead of skipped
+        _resume_after_id = last_checked_id
+        logging.error(f"Scheduler error, cycle incomplete after ID {last_checked_id}: {str(e)}")
+    
+    finally:
+        profile_path = finish_session(profile)
+        if profile_path:
+            logging.info(f"Cycle profile written to {profile_path}.*")
 
 def start_scheduler(interval_hours=0, interval_minutes=1):
     """Start the scheduler with specified interval"""
+    configure_logging()
     total_minutes = (interval_hours * 60) + interval_minutes
     logging.info(f"Starting scheduler with {interval_hours}h {interval_minutes}m ({total_minutes} minutes) interval")
     
+    # A cycle must finish within part of the interval so it never overlaps the next one
+    deadline_seconds = total_minutes * 60 * CYCLE_DEADLINE_FRACTION
+    
     # Schedule the job
-    schedule.every(total_minutes).minutes.do(scheduled_health_check)
+    schedule.every(total_minutes).minutes.do(scheduled_health_check, deadline_seconds=deadline_seconds)
     
     # Run immediately on start
-    scheduled_health_check()
+    scheduled_health_check(deadline_seconds=deadline_seconds)
     
     # Keep the scheduler running
     while True:
@@ -0,0 +1,144 @@
+import re
+import time
+import threading
+
+from sql import LISTING_COLUMNS, pg_trgm_installed, scan_url_data, search_url_data
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Candidates must share at least this fraction of the query's trigrams
+MIN_SCORE = 0.3
+
+# Seconds before the in-process index is rebuilt, so changes from other processes show up
+INDEX_TTL = 300
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: lowercase words padded with two leading and one trailing space"""
+    result = set()
+    for word in WORD_PATTERN.findall((text or "").lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+class TrigramIndex:
+    """
+    In-process trigram index over the catalog for backends without pg_trgm
+
+    Holds only the listing columns (no response payloads) and an inverted index
+    from trigram to row positions, so a search touches only matching rows.
+    """
+
+    def __init__(self, rows):
+        self.rows = []
+        self.documents = []
+        self.postings = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row):
+        position = len(self.rows)
+        record = {column: row.get(column) for column in LISTING_COLUMNS}
+        document = " ".join(str(record.get(column) or "") for column in ('name', 'description', 'original_url', 'routing_url'))
+        self.rows.append(record)
+        self.documents.append(document.lower())
+        for trigram in trigrams(document):
+            self.postings.setdefault(trigram, []).append(position)
+
+    def search(self, query=None, limit=50, offset=0, environment=None):
+        """
+        Ranked, paginated search with the same result shape as sql.search_url_data()
+
+        Returns:
+            tuple: (list of dicts with LISTING_COLUMNS and 'score', whether a next page exists)
+        """
+        if not query:
+            matches = [(1.0, position) for position in range(len(self.rows))]
+            matches.sort(key=lambda match: self.rows[match[1]].get('created_at') or 0, reverse=True)
+        else:
+            query_trigrams = trigrams(query)
+            counts = {}
+            for trigram in query_trigrams:
+                for position in self.postings.get(trigram, ()):
+                    counts[position] = counts.get(position, 0) + 1
+
+            needle = query.lower()
+            matches = []
+            for position, count in counts.items():
+                score = count / len(query_trigrams)
+                if needle in self.documents[position]:
+                    score = 1.0
+                if score >= MIN_SCORE:
+                    matches.append((score, position))
+            matches.sort(key=lambda match: (match[0], self.rows[match[1]].get('created_at') or 0), reverse=True)
+
+        if environment:
+            matches = [match for match in matches if self.rows[match[1]].get('environment') == environment]
+
+        page = [{**self.rows[position], 'score': score} for score, position in matches[offset:offset + limit]]
+        return page, len(matches) > offset + limit
+
+
+_index = None
+_index_built_at = None
+_index_lock = threading.Lock()
+
+# Checked once per process; None until a check succeeds
+_pg_trgm = None
+
+
+def get_trigram_index(rebuild=False):
+    """
+    Process-wide in-process index, built by streaming the catalog and rebuilt after INDEX_TTL
+
+    Raises:
+        Exception: Scan errors are re-raised and nothing is cached, so the next call retries
+    """
+    global _index, _index_built_at
+    with _index_lock:
+        if _index is None or rebuild or time.monotonic() - _index_built_at > INDEX_TTL:
+            index = TrigramIndex(scan_url_data(columns=LISTING_COLUMNS))
+            _index, _index_built_at = index, time.monotonic()
+        return _index
+
+
+def invalidate_trigram_index():
+    """Drop the in-process index so the next fallback search rebuilds it"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def search_catalog(query=None, limit=50, offset=0, environment=None):
+    """
+    Search the catalog with pg_trgm, falling back to the in-process index when it is not installed
+
+    Args:
+        query (str, optional): Search text; empty lists the newest records
+        limit (int, optional): Page size
+        offset (int, optional): Rows to skip
+        environment (str, optional): Only return this environment
+
+    Returns:
+        tuple: (list of dicts with LISTING_COLUMNS and 'score', whether a next page exists),
+            or None if the database could not be searched
+    """
+    global _pg_trgm
+    if _pg_trgm is None:
+        _pg_trgm = pg_trgm_installed()
+        if _pg_trgm is None:
+            return None
+
+    if _pg_trgm:
+        # Errors here are transient; falling back would only hide them
+        return search_url_data(query, limit=limit, offset=offset, environment=environment)
+
+    try:
+        index = get_trigram_index()
+    except Exception as e:
+        print(f"❌ Error building search index: {e}")
+        return None
+    return index.search(query, limit=limit, offset=offset, environment=environment)
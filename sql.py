@@ -1,7 +1,9 @@
 import psycopg2
-import json
+from codec import dumps as json_dumps
+from profiling import timed
 from datetime import datetime
 
+@timed("db_connect")
 def connect_to_retool():
     # amazonq-ignore-next-line
     return psycopg2.connect(
@@ -31,14 +33,14 @@ def list_retool_tables():
             conn.close()
         return []
 
-def create_table():
-    try:
-        conn = connect_to_retool()
-        cursor = conn.cursor()
-        # Name table as service virtualisation
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS service_virtualisation (
-            id SERIAL PRIMARY KEY,
+# Environments with their own partition; anything else lands in the default partition
+ENVIRONMENTS = ('Dev', 'Test', 'Staging', 'Prod')
+
+# Stored for records created without an environment (partition key cannot be NULL)
+DEFAULT_ENVIRONMENT = 'Unassigned'
+
+TABLE_COLUMNS_DDL = """
+            id INTEGER NOT NULL DEFAULT nextval('service_virtualisation_id_seq'),
             name VARCHAR(255) NOT NULL,
             description TEXT,
             original_url TEXT,
@@ -49,18 +51,111 @@ def create_table():
             response json,
             api_details TEXT,
             lob VARCHAR(100),
-            environment VARCHAR(50),
+            environment VARCHAR(50) NOT NULL DEFAULT 'Unassigned',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, environment)
+"""
+
+
+def partition_name(environment):
+    """Name of the partition holding rows for an environment"""
+    if environment in ENVIRONMENTS:
+        return f"service_virtualisation_{environment.lower()}"
+    return "service_virtualisation_default"
+
+
+def _create_partitioned_table(cursor):
+    """Create the environment-partitioned service_virtualisation table and its partitions"""
+    cursor.execute("CREATE SEQUENCE IF NOT EXISTS service_virtualisation_id_seq;")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS service_virtualisation (
+            {TABLE_COLUMNS_DDL}
+        ) PARTITION BY LIST (environment);
+    """)
+    for environment in ENVIRONMENTS:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {partition_name(environment)}
+            PARTITION OF service_virtualisation FOR VALUES IN (%s);
+        """, (environment,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_virtualisation_default
+        PARTITION OF service_virtualisation DEFAULT;
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS service_virtualisation_routing_url_idx ON service_virtualisation (routing_url);")
+    # Newest-first catalog listing reads only the requested page
+    cursor.execute("CREATE INDEX IF NOT EXISTS service_virtualisation_created_at_idx ON service_virtualisation (created_at DESC);")
+    _create_encodings_table(cursor)
+    cursor.execute("ALTER SEQUENCE service_virtualisation_id_seq OWNED BY service_virtualisation.id;")
+
+
+def _create_encodings_table(cursor):
+    """Create the table of precompressed response bodies (gzip/br/zstd), written once per response update"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_virtualisation_encodings (
+            record_id INTEGER NOT NULL,
+            environment VARCHAR(50),
+            encoding VARCHAR(16) NOT NULL,
+            etag TEXT NOT NULL,
+            body BYTEA NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (record_id, encoding)
         );
-        """
-          
-        cursor.execute(create_table_query)
+    """)
+
+
+# Set once the encodings table has been seen, so the check costs one query per process
+_encodings_table_seen = False
+
+
+def _encodings_table_exists(cursor):
+    """
+    True if service_virtualisation_encodings exists
+
+    Databases set up before precompression lack it until the first encodings write
+    creates it, so statements on it are skipped rather than failing the whole transaction.
+    """
+    global _encodings_table_seen
+    if not _encodings_table_seen:
+        cursor.execute("SELECT to_regclass('service_virtualisation_encodings') IS NOT NULL;")
+        _encodings_table_seen = cursor.fetchone()[0]
+    return _encodings_table_seen
+
+
+def _is_legacy_table(cursor):
+    """True if service_virtualisation exists but is not partitioned (pre-partitioning layout)"""
+    cursor.execute("""
+        SELECT c.relkind FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = 'service_virtualisation' AND n.nspname = current_schema();
+    """)
+    row = cursor.fetchone()
+    # 'p' is a partitioned table, 'r' an ordinary one
+    return row is not None and row[0] == 'r'
+
+
+def create_table():
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        if _is_legacy_table(cursor):
+            # PARTITION OF fails against an ordinary table; move it to the partitioned layout instead
+            cursor.close()
+            conn.close()
+            print("service_virtualisation is not partitioned, migrating it to the partitioned layout")
+            if not migrate_to_partitioned_table():
+                print("Migration failed; run migrate_to_partitioned_table() manually (see README)")
+            return
+
+        # Name table as service virtualisation, partitioned by environment
+        _create_partitioned_table(cursor)
         conn.commit()
 
         cursor.close()
         conn.close()
         print("service_virtualisation table created (or already exists)")
+        create_search_index()
     except Exception as e:
         print(f"Error creating table: {e}")
         if 'conn' in locals():
@@ -70,11 +165,92 @@ def create_table():
             conn.close()
 
 
+# Index names a pre-partitioning table may carry, renamed along with the table on migration
+LEGACY_INDEX_NAMES = (
+    'service_virtualisation_pkey',
+    'service_virtualisation_routing_url_idx',
+    'service_virtualisation_created_at_idx',
+    'service_virtualisation_search_trgm_idx',
+)
+
+
+def migrate_to_partitioned_table(keep_legacy=False):
+    """
+    Move an existing unpartitioned service_virtualisation table to the partitioned layout
+
+    Runs in a single transaction: the old table is renamed, the partitioned table
+    is created, rows are copied (NULL environments become 'Unassigned') and the id
+    sequence is carried over so ids are preserved.
+
+    Args:
+        keep_legacy (bool, optional): Keep the old table as service_virtualisation_legacy
+
+    Returns:
+        bool: True if migrated or already partitioned, False on failure
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = 'service_virtualisation';
+        """)
+        if cursor.fetchone():
+            cursor.close()
+            conn.close()
+            print("service_virtualisation is already partitioned")
+            return True
+
+        cursor.execute("LOCK TABLE service_virtualisation IN ACCESS EXCLUSIVE MODE;")
+        cursor.execute("ALTER TABLE service_virtualisation RENAME TO service_virtualisation_legacy;")
+        # Legacy indexes keep their names after the rename; free them for the new table,
+        # otherwise CREATE INDEX IF NOT EXISTS would skip creating them there
+        for index_name in LEGACY_INDEX_NAMES:
+            cursor.execute(f"ALTER INDEX IF EXISTS {index_name} RENAME TO {index_name.replace('service_virtualisation_', 'service_virtualisation_legacy_', 1)};")
+        _create_partitioned_table(cursor)
+
+        cursor.execute("""
+            INSERT INTO service_virtualisation (id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, environment, created_at, updated_at)
+            SELECT id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, COALESCE(environment, %s), created_at, updated_at
+            FROM service_virtualisation_legacy;
+        """, (DEFAULT_ENVIRONMENT,))
+        migrated = cursor.rowcount
+
+        cursor.execute("SELECT setval('service_virtualisation_id_seq', COALESCE((SELECT MAX(id) FROM service_virtualisation), 0) + 1, false);")
+
+        if keep_legacy:
+            # Detach the sequence from the legacy table so it survives a later DROP
+            cursor.execute("ALTER TABLE service_virtualisation_legacy ALTER COLUMN id DROP DEFAULT;")
+        else:
+            cursor.execute("DROP TABLE service_virtualisation_legacy;")
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+        print(f"Migrated {migrated} rows to the partitioned service_virtualisation table")
+        # The search index lived on the legacy table; recreate it on the new one
+        create_search_index()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error migrating to partitioned table: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return False
+
+
 
 
 # create_table()
 
 
+@timed("insert_url_data")
 def insert_url_data(name, original_url, routing_url, description=None, operation=None, headers=None, parameters=None, response=None, api_details=None, lob=None, environment=None):
     """
     Insert data into the service_virtualisation table
@@ -90,11 +266,13 @@ def insert_url_data(name, original_url, routing_url, description=None, operation
         response (str, optional): JSON string containing response
         api_details (str, optional): JSON string or text containing API details
         lob (str, optional): Line of Business
-        environment (str, optional): Environment (Dev, Test, Staging, Prod)
+        environment (str, optional): Environment (Dev, Test, Staging, Prod). Selects the table partition;
+            records without one are stored as 'Unassigned'
     
     Returns:
         int: The ID of the inserted record, or None if insertion failed
     """
+    environment = environment or DEFAULT_ENVIRONMENT
     try:
         conn = connect_to_retool()
         cursor = conn.cursor()
@@ -125,6 +303,59 @@ def insert_url_data(name, original_url, routing_url, description=None, operation
         return None
 
 
+def insert_url_data_batch(records):
+    """
+    Insert one record per environment into the service_virtualisation table in one statement
+
+    Args:
+        records (list): Dicts with the insert_url_data() keyword arguments, each with a
+            distinct environment
+
+    Returns:
+        dict: Stored environment -> ID of the record inserted for it, or None if insertion failed
+    """
+    from psycopg2.extras import execute_values
+
+    columns = ('name', 'description', 'original_url', 'operation', 'routing_url', 'headers', 'parameters', 'response', 'api_details', 'lob', 'environment')
+    rows = [
+        tuple(record.get(column) if column != 'environment' else (record.get('environment') or DEFAULT_ENVIRONMENT) for column in columns)
+        for record in records
+    ]
+    environments = [row[-1] for row in rows]
+    if len(set(environments)) != len(environments):
+        print(f"❌ Error inserting data: duplicate environments in batch {environments}")
+        return None
+
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        insert_query = f"""
+        INSERT INTO service_virtualisation ({', '.join(columns)})
+        VALUES %s
+        RETURNING id, environment;
+        """
+
+        # RETURNING order is not guaranteed, so map each id back by its environment
+        inserted_ids = {environment: inserted_id for inserted_id, environment in execute_values(cursor, insert_query, rows, fetch=True)}
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+        print(f"Data inserted successfully with IDs: {inserted_ids}")
+        return inserted_ids
+
+    except Exception as e:
+        print(f"❌ Error inserting data: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None
+
+
 def get_existing_data():
     try:
         conn = connect_to_retool()
@@ -148,12 +379,14 @@ def get_existing_data():
         return []
 
 
-def get_url_data(url_id=None):
+@timed("get_url_data")
+def get_url_data(url_id=None, environment=None):
     """
     Retrieve data from the service_virtualisation table
     
     Args:
         url_id (int, optional): Specific ID to retrieve. If None, returns all records.
+        environment (str, optional): Only read this environment's partition
     
     Returns:
         list: List of dictionaries containing the service virtualisation data
@@ -162,12 +395,16 @@ def get_url_data(url_id=None):
         conn = connect_to_retool()
         cursor = conn.cursor()
 
+        # Filtering on environment lets Postgres prune to a single partition
+        environment_filter = " and environment = %s" if environment else ""
+        environment_params = (environment,) if environment else ()
+
         if url_id:
-            query = "SELECT id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, environment, created_at, updated_at FROM service_virtualisation WHERE id = %s and original_url!= 'Not Applicable';"
-            cursor.execute(query, (url_id,))
+            query = f"SELECT id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, environment, created_at, updated_at FROM service_virtualisation WHERE id = %s and original_url!= 'Not Applicable'{environment_filter};"
+            cursor.execute(query, (url_id,) + environment_params)
         else:
-            query = "SELECT id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, environment, created_at, updated_at FROM service_virtualisation WHERE original_url!= 'Not Applicable' ORDER BY created_at DESC;"
-            cursor.execute(query)
+            query = f"SELECT id, name, description, original_url, operation, routing_url, headers, parameters, response, api_details, lob, environment, created_at, updated_at FROM service_virtualisation WHERE original_url!= 'Not Applicable'{environment_filter} ORDER BY created_at DESC;"
+            cursor.execute(query, environment_params)
 
         rows = cursor.fetchall()
         columns = ['id', 'name', 'description', 'original_url', 'operation', 'routing_url', 'headers', 'parameters', 'response', 'api_details', 'lob', 'environment', 'created_at', 'updated_at']
@@ -190,13 +427,131 @@ def get_url_data(url_id=None):
     
 
 
-def update_mock_data(id, updated_response):
+# Columns that may be projected by scan_url_data()
+SCAN_COLUMNS = ('id', 'name', 'description', 'original_url', 'operation', 'routing_url', 'headers', 'parameters', 'response', 'api_details', 'lob', 'environment', 'created_at', 'updated_at')
+
+# Default projection: what the scheduler needs to refresh a record
+SCHEDULER_COLUMNS = ('id', 'original_url', 'operation', 'headers', 'parameters', 'environment', 'updated_at')
+
+DEFAULT_FETCH_SIZE = 500
+
+_row_types = {}
+
+
+def _row_type(columns):
+    """
+    Build (once per projection) a compact __slots__ record class for scan rows
+
+    Rows support attribute access as well as record['col'] and record.get('col')
+    so existing dict-based callers keep working.
+    """
+    if columns in _row_types:
+        return _row_types[columns]
+
+    def __init__(self, *values):
+        for column, value in zip(columns, values):
+            setattr(self, column, value)
+
+    def __getitem__(self, column):
+        try:
+            return getattr(self, column)
+        except AttributeError:
+            raise KeyError(column)
+
+    def get(self, column, default=None):
+        return getattr(self, column, default)
+
+    def __repr__(self):
+        return "CatalogRow(" + ", ".join(f"{column}={getattr(self, column)!r}" for column in columns) + ")"
+
+    row_type = type("CatalogRow", (), {
+        '__slots__': columns,
+        '__init__': __init__,
+        '__getitem__': __getitem__,
+        'get': get,
+        '__repr__': __repr__,
+    })
+    _row_types[columns] = row_type
+    return row_type
+
+
+def scan_url_data(columns=SCHEDULER_COLUMNS, fetch_size=DEFAULT_FETCH_SIZE, include_not_applicable=False, after_id=None, until_id=None, environment=None):
+    """
+    Stream records from the service_virtualisation table in keyset-paginated batches
+
+    Each batch is one short query (WHERE id > last id ORDER BY id LIMIT fetch_size)
+    on its own connection, so no transaction stays open while the caller works
+    through the rows, and only fetch_size rows are held in memory at a time.
+
+    Args:
+        columns (tuple, optional): Columns to project, from SCAN_COLUMNS
+        fetch_size (int, optional): Rows fetched per batch
+        include_not_applicable (bool, optional): Include mocks without an original URL
+        after_id (int, optional): Only rows with id greater than this
+        until_id (int, optional): Only rows with id less than or equal to this
+        environment (str, optional): Only scan this environment's partition
+
+    Yields:
+        CatalogRow: Compact row object with the projected columns
+
+    Raises:
+        Exception: Database errors are re-raised so callers can tell a failed scan from an empty one
+    """
+    columns = tuple(columns)
+    unknown = [column for column in columns if column not in SCAN_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns for scan: {unknown}")
+
+    row_type = _row_type(columns)
+    conditions = ["id > %s"]
+    query_params = []
+    if not include_not_applicable:
+        conditions.append("original_url != 'Not Applicable'")
+    if until_id is not None:
+        conditions.append("id <= %s")
+        query_params.append(until_id)
+    if environment:
+        conditions.append("environment = %s")
+        query_params.append(environment)
+
+    # id is always selected first as the keyset, then dropped from the row
+    query = f"SELECT id, {', '.join(columns)} FROM service_virtualisation WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s;"
+
+    last_id = after_id if after_id is not None else -1
+    while True:
+        conn = None
+        try:
+            conn = connect_to_retool()
+            cursor = conn.cursor()
+            cursor.execute(query, [last_id] + query_params + [fetch_size])
+            rows = cursor.fetchall()
+            cursor.close()
+
+        except Exception as e:
+            print(f"❌ Error scanning data: {e}")
+            raise
+
+        finally:
+            if conn is not None:
+                conn.close()
+
+        for row in rows:
+            yield row_type(*row[1:])
+
+        if len(rows) < fetch_size:
+            return
+        last_id = rows[-1][0]
+
+
+@timed("update_mock_data")
+def update_mock_data(id, updated_response, environment=None):
     """
     Update the mock data for a specific record
 
     Args:
         id (int): The ID of the record to update
         updated_response: The updated response data (dict, list, or string)
+        environment (str, optional): The record's environment, so only its partition is touched
     """
     try:
         conn = connect_to_retool()
@@ -205,16 +560,16 @@ def update_mock_data(id, updated_response):
         update_query = """
         UPDATE service_virtualisation
         SET response = %s, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s;
+        WHERE id = %s AND (%s IS NULL OR environment = %s);
         """
         
         # Convert to JSON string if it's a dict or list
         if isinstance(updated_response, (dict, list)):
-            response_data = json.dumps(updated_response)
+            response_data = json_dumps(updated_response)
         else:
             response_data = updated_response
 
-        cursor.execute(update_query, (response_data, id))
+        cursor.execute(update_query, (response_data, id, environment, environment))
         conn.commit()
 
         cursor.close()
@@ -232,12 +587,13 @@ def update_mock_data(id, updated_response):
         return False
 
 
-def delete_response(id):
+def delete_response(id, environment=None):
     """
     Delete the response data for a specific record by setting it to NULL
 
     Args:
         id (int): The ID of the record to update
+        environment (str, optional): The record's environment, so only its partition is touched
     """
     try:
         conn = connect_to_retool()
@@ -246,10 +602,12 @@ def delete_response(id):
         update_query = """
         UPDATE service_virtualisation
         SET response = NULL, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s;
+        WHERE id = %s AND (%s IS NULL OR environment = %s);
         """
 
-        cursor.execute(update_query, (id,))
+        cursor.execute(update_query, (id, environment, environment))
+        if _encodings_table_exists(cursor):
+            cursor.execute("DELETE FROM service_virtualisation_encodings WHERE record_id = %s;", (id,))
         conn.commit()
 
         cursor.close()
@@ -267,3 +625,388 @@ def delete_response(id):
         return False
 
 
+def store_encoded_variants(record_id, etag, variants, environment=None):
+    """
+    Replace the precompressed bodies stored for a record
+
+    Args:
+        record_id (int): The ID of the record
+        etag (str): ETag of the uncompressed body the variants were built from
+        variants (dict): Mapping of encoding name to compressed bytes (empty to clear)
+        environment (str, optional): The record's environment
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        if not _encodings_table_exists(cursor):
+            # First write on a database set up before precompression
+            _create_encodings_table(cursor)
+        cursor.execute("DELETE FROM service_virtualisation_encodings WHERE record_id = %s;", (record_id,))
+        if variants:
+            cursor.executemany(
+                """
+                INSERT INTO service_virtualisation_encodings (record_id, environment, encoding, etag, body)
+                VALUES (%s, %s, %s, %s, %s);
+                """,
+                [(record_id, environment, encoding, etag, psycopg2.Binary(body)) for encoding, body in variants.items()]
+            )
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f" Error storing encoded variants: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return False
+
+
+def get_encoded_variants(record_id):
+    """
+    Read the precompressed bodies stored for a record
+
+    Args:
+        record_id (int): The ID of the record
+
+    Returns:
+        tuple: (etag, {encoding: bytes}), or (None, {}) if none are stored
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        rows = []
+        if _encodings_table_exists(cursor):
+            cursor.execute("SELECT encoding, etag, body FROM service_virtualisation_encodings WHERE record_id = %s;", (record_id,))
+            rows = cursor.fetchall()
+
+        cursor.close()
+        conn.close()
+
+        if not rows:
+            return None, {}
+        return rows[0][1], {encoding: bytes(body) for encoding, _, body in rows}
+
+    except Exception as e:
+        print(f"❌ Error retrieving encoded variants: {e}")
+        if 'conn' in locals():
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None, {}
+
+
+def get_encoded_etag(record_id):
+    """
+    Read only the ETag of a record's precompressed bodies, without the bodies
+
+    Args:
+        record_id (int): The ID of the record
+
+    Returns:
+        str: The stored ETag, or None if nothing is stored (or the lookup failed)
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        row = None
+        if _encodings_table_exists(cursor):
+            cursor.execute("SELECT etag FROM service_virtualisation_encodings WHERE record_id = %s LIMIT 1;", (record_id,))
+            row = cursor.fetchone()
+
+        cursor.close()
+        conn.close()
+        return row[0] if row else None
+
+    except Exception as e:
+        print(f"❌ Error retrieving encoded etag: {e}")
+        if 'conn' in locals():
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None
+
+
+def _execute_bulk(statements, encodings_statements=()):
+    """
+    Run several set-based statements in one transaction
+
+    Args:
+        statements (list): (query, params) tuples; the first one's rowcount is returned
+        encodings_statements (list, optional): (query, params) tuples on
+            service_virtualisation_encodings, skipped while that table does not exist
+
+    Returns:
+        int: Rows affected by the first statement, or None if the transaction failed
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        affected = None
+        for query, params in statements:
+            cursor.execute(query, params)
+            if affected is None:
+                affected = cursor.rowcount
+        if encodings_statements and _encodings_table_exists(cursor):
+            for query, params in encodings_statements:
+                cursor.execute(query, params)
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return affected
+
+    except Exception as e:
+        print(f"❌ Error running bulk action: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None
+
+
+def bulk_clear_responses(ids):
+    """
+    Set the response to NULL for many records in one statement
+
+    Args:
+        ids (list): Record IDs
+
+    Returns:
+        int: Number of records updated, or None on failure
+    """
+    ids = list(ids)
+    affected = _execute_bulk(
+        [("UPDATE service_virtualisation SET response = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ANY(%s);", (ids,))],
+        encodings_statements=[("DELETE FROM service_virtualisation_encodings WHERE record_id = ANY(%s);", (ids,))]
+    )
+    if affected is not None:
+        print(f" Cleared responses for {affected} records")
+    return affected
+
+
+def bulk_delete_records(ids):
+    """
+    Delete many records (and their precompressed bodies) in one transaction
+
+    Args:
+        ids (list): Record IDs
+
+    Returns:
+        int: Number of records deleted, or None on failure
+    """
+    ids = list(ids)
+    affected = _execute_bulk(
+        [("DELETE FROM service_virtualisation WHERE id = ANY(%s);", (ids,))],
+        encodings_statements=[("DELETE FROM service_virtualisation_encodings WHERE record_id = ANY(%s);", (ids,))]
+    )
+    if affected is not None:
+        print(f" Deleted {affected} records")
+    return affected
+
+
+def bulk_update_environment_lob(ids, environment=None, lob=None):
+    """
+    Move many records to another environment and/or LOB in one statement
+
+    Changing the environment moves the rows to that environment's partition.
+
+    Args:
+        ids (list): Record IDs
+        environment (str, optional): New environment; unchanged if None
+        lob (str, optional): New Line of Business; unchanged if None
+
+    Returns:
+        int: Number of records updated, or None on failure
+    """
+    ids = list(ids)
+    affected = _execute_bulk(
+        [("""
+        UPDATE service_virtualisation
+        SET environment = COALESCE(%s, environment), lob = COALESCE(%s, lob), updated_at = CURRENT_TIMESTAMP
+        WHERE id = ANY(%s);
+        """, (environment, lob, ids))],
+        encodings_statements=[("UPDATE service_virtualisation_encodings SET environment = COALESCE(%s, environment) WHERE record_id = ANY(%s);", (environment, ids))]
+    )
+    if affected is not None:
+        print(f" Updated environment/LOB for {affected} records")
+    return affected
+
+
+def get_url_data_by_ids(ids, columns=SCHEDULER_COLUMNS):
+    """
+    Fetch many records in one query
+
+    Args:
+        ids (list): Record IDs
+        columns (tuple, optional): Columns to project, from SCAN_COLUMNS
+
+    Returns:
+        list: CatalogRow objects with the projected columns
+    """
+    columns = tuple(columns)
+    unknown = [column for column in columns if column not in SCAN_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+    row_type = _row_type(columns)
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT {', '.join(columns)} FROM service_virtualisation WHERE id = ANY(%s) ORDER BY id;", (list(ids),))
+        rows = [row_type(*row) for row in cursor.fetchall()]
+
+        cursor.close()
+        conn.close()
+        return rows
+
+    except Exception as e:
+        print(f"❌ Error retrieving data: {e}")
+        if 'conn' in locals():
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return []
+
+
+# Text searched by the catalog search box; must match the expression of the trigram index
+SEARCH_DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(original_url, '') || ' ' || coalesce(routing_url, ''))"
+
+# Columns shown in catalog listings (no response payloads)
+LISTING_COLUMNS = ('id', 'name', 'description', 'original_url', 'operation', 'routing_url', 'lob', 'environment', 'created_at', 'updated_at')
+
+
+def create_search_index():
+    """
+    Create the pg_trgm index used by search_url_data()
+
+    Kept separate from create_table() because CREATE EXTENSION may need extra
+    privileges; without it search falls back to an in-process index.
+
+    Returns:
+        bool: True if the index exists, False otherwise
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS service_virtualisation_search_trgm_idx ON service_virtualisation USING gin ({SEARCH_DOCUMENT} gin_trgm_ops);")
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+        print("service_virtualisation search index created (or already exists)")
+        return True
+
+    except Exception as e:
+        print(f"Error creating search index: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return False
+
+
+def pg_trgm_installed():
+    """
+    Check whether the pg_trgm extension is installed
+
+    Returns:
+        bool: True if installed, False if not, or None if the check failed
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm';")
+        installed = cursor.fetchone() is not None
+
+        cursor.close()
+        conn.close()
+        return installed
+
+    except Exception as e:
+        print(f"❌ Error checking for pg_trgm: {e}")
+        if 'conn' in locals():
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None
+
+
+@timed("search_url_data")
+def search_url_data(query=None, limit=50, offset=0, environment=None):
+    """
+    Ranked, paginated search over name, description, original URL and routing URL
+
+    Uses the pg_trgm index (or the created_at index for an empty query, which lists
+    the newest records). One row past the page is fetched to tell whether a next
+    page exists, so no full count of the matches is needed.
+
+    Args:
+        query (str, optional): Search text
+        limit (int, optional): Page size
+        offset (int, optional): Rows to skip
+        environment (str, optional): Only search this environment's partition
+
+    Returns:
+        tuple: (list of dicts with LISTING_COLUMNS and 'score', whether a next page exists),
+            or None if the search failed
+    """
+    try:
+        conn = connect_to_retool()
+        cursor = conn.cursor()
+
+        conditions = ["original_url != 'Not Applicable'"]
+        params = []
+        if environment:
+            conditions.append("environment = %s")
+            params.append(environment)
+
+        if query:
+            # ILIKE and <% are both served by the trigram index
+            conditions.append(f"({SEARCH_DOCUMENT} ILIKE %s OR %s <%% {SEARCH_DOCUMENT})")
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.extend([f"%{escaped}%", query])
+            score = f"word_similarity(%s, {SEARCH_DOCUMENT})"
+            order_by = "score DESC, created_at DESC"
+            params = [query] + params
+        else:
+            score = "1.0"
+            order_by = "created_at DESC"
+
+        sql_query = f"""
+        SELECT {', '.join(LISTING_COLUMNS)}, {score} AS score
+        FROM service_virtualisation
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order_by}
+        LIMIT %s OFFSET %s;
+        """
+        cursor.execute(sql_query, params + [limit + 1, offset])
+        rows = cursor.fetchall()
+
+        cursor.close()
+        conn.close()
+
+        columns = LISTING_COLUMNS + ('score',)
+        return [dict(zip(columns, row)) for row in rows[:limit]], len(rows) > limit
+
+    except Exception as e:
+        print(f"❌ Error searching data: {e}")
+        if 'conn' in locals():
+            if 'cursor' in locals():
+                cursor.close()
+            conn.close()
+        return None
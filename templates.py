@@ -0,0 +1,181 @@
+import re
+import json
+import uuid
+import random
+import itertools
+from datetime import datetime, timezone
+
+
+# Placeholders look like {{now}}, {{now:%Y-%m-%d}}, {{path.user_id}},
+# {{query.page}}, {{counter}}, {{counter.orders}}, {{uuid}} or {{random_id:12}}.
+# Rendering happens in the external mock server (the /route service); this repo
+# only compiles templates to decide whether a response can be precompressed.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([a-z_]+)(?:\.([A-Za-z0-9_\-]+))?(?::([^}]*))?\s*\}\}")
+PATH_PARAM_PATTERN = re.compile(r"\{([A-Za-z0-9_]+)\}")
+
+# Compiled templates keyed by record id -> (version, CompiledTemplate)
+_compiled_cache = {}
+# (record id, counter name) -> itertools.count, so each mock has its own sequences
+_counters = {}
+
+
+def _escape(value):
+    """Escape a substituted value so it stays valid inside a JSON string"""
+    return json.dumps(str(value))[1:-1].encode("utf-8")
+
+
+def _next_counter(record_id, name):
+    key = (record_id, name)
+    if key not in _counters:
+        _counters[key] = itertools.count(1)
+    return next(_counters[key])
+
+
+def _build_resolver(kind, name, arg):
+    """Turn one placeholder into a callable taking the render context"""
+    if kind == "now":
+        if arg:
+            return lambda ctx: _escape(ctx["now"].strftime(arg))
+        return lambda ctx: _escape(ctx["now"].isoformat())
+    if kind == "epoch":
+        return lambda ctx: str(int(ctx["now"].timestamp())).encode("utf-8")
+    if kind == "path":
+        return lambda ctx: _escape(ctx["path"].get(name, arg or ""))
+    if kind == "query":
+        return lambda ctx: _escape(ctx["query"].get(name, arg or ""))
+    if kind == "counter":
+        counter_name = name or "default"
+        return lambda ctx: str(_next_counter(ctx["record_id"], counter_name)).encode("utf-8")
+    if kind == "uuid":
+        return lambda ctx: str(uuid.uuid4()).encode("utf-8")
+    if kind == "random_id":
+        length = int(arg) if arg and arg.isdigit() else 8
+        return lambda ctx: "".join(random.choices("0123456789abcdef", k=length)).encode("utf-8")
+    return None
+
+
+class CompiledTemplate:
+    """A response body split into static byte segments and dynamic resolvers"""
+
+    __slots__ = ("segments", "is_static")
+
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+        self.is_static = all(isinstance(segment, bytes) for segment in self.segments)
+
+    def render(self, path_params=None, query_params=None, now=None, record_id=None):
+        if self.is_static:
+            return self.segments[0] if self.segments else b""
+
+        context = {
+            "path": path_params or {},
+            "query": query_params or {},
+            "now": now or datetime.now(timezone.utc),
+            "record_id": record_id,
+        }
+        return b"".join(
+            segment if isinstance(segment, bytes) else segment(context)
+            for segment in self.segments
+        )
+
+
+def compile_template(body):
+    """
+    Compile a response body into a CompiledTemplate
+
+    Args:
+        body (str, bytes or any JSON value): The stored mock response
+
+    Returns:
+        CompiledTemplate: Template ready for cheap rendering
+    """
+    if body is None:
+        return CompiledTemplate([])
+    if not isinstance(body, (str, bytes)):
+        # dicts, lists and JSON scalars (numbers, booleans) read back from the json column
+        body = json.dumps(body)
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(body):
+        resolver = _build_resolver(*match.groups())
+        if resolver is None:
+            # Unknown placeholder, keep it as literal text
+            continue
+        if match.start() > position:
+            segments.append(body[position:match.start()].encode("utf-8"))
+        segments.append(resolver)
+        position = match.end()
+
+    if position < len(body):
+        segments.append(body[position:].encode("utf-8"))
+
+    # Merge adjacent literals so static bodies end up as one segment
+    merged = []
+    for segment in segments:
+        if merged and isinstance(segment, bytes) and isinstance(merged[-1], bytes):
+            merged[-1] += segment
+        else:
+            merged.append(segment)
+
+    return CompiledTemplate(merged)
+
+
+def get_compiled_template(record):
+    """
+    Return the compiled template for a record, compiling only when the record changed
+
+    Args:
+        record (dict): Record with at least 'id', 'response' and 'updated_at'
+
+    Returns:
+        CompiledTemplate: Cached or freshly compiled template
+    """
+    version = record.get('updated_at')
+    cached = _compiled_cache.get(record['id'])
+    if cached and cached[0] == version:
+        return cached[1]
+
+    compiled = compile_template(record.get('response'))
+    _compiled_cache[record['id']] = (version, compiled)
+    return compiled
+
+
+def match_path_params(routing_url, request_path):
+    """
+    Extract path parameters from a request path using a routing URL pattern
+
+    Args:
+        routing_url (str): Stored routing URL, e.g. '/users/{user_id}'
+        request_path (str): Incoming request path, e.g. '/users/42'
+
+    Returns:
+        dict: Mapping of parameter names to values, or None if the path does not match
+    """
+    routing_path = routing_url.split("?", 1)[0]
+    pattern = "^" + PATH_PARAM_PATTERN.sub(r"(?P<\1>[^/]+)", re.escape(routing_path).replace(r"\{", "{").replace(r"\}", "}")) + "$"
+    match = re.match(pattern, request_path.split("?", 1)[0])
+    if not match:
+        return None
+    return match.groupdict()
+
+
+def render_record(record, request_path=None, query_params=None):
+    """
+    Render a record's response for one request
+
+    Args:
+        record (dict): Record from get_url_data()
+        request_path (str, optional): Incoming request path for path placeholders
+        query_params (dict, optional): Incoming query values for query placeholders
+
+    Returns:
+        bytes: Rendered response body
+    """
+    compiled = get_compiled_template(record)
+    path_params = None
+    if request_path and not compiled.is_static:
+        path_params = match_path_params(record.get('routing_url') or "", request_path)
+    return compiled.render(path_params=path_params, query_params=query_params, record_id=record.get('id'))
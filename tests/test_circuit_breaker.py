@@ -0,0 +1,37 @@
+from circuit_breaker import HostGuard, host_of
+
+
+def test_host_of():
+    assert host_of("https://API.example.com:8443/users?x=1") == "api.example.com:8443"
+
+
+def test_try_acquire_waits_when_bucket_is_empty():
+    guard = HostGuard(rate_per_second=1, burst=1)
+
+    assert guard.try_acquire("a") == (0, True)
+    wait, allowed = guard.try_acquire("a")
+
+    assert wait > 0
+    assert not allowed
+    # Other hosts have their own bucket
+    assert guard.try_acquire("b") == (0, True)
+
+
+def test_breaker_opens_after_failures_and_skips_requests():
+    guard = HostGuard(failure_threshold=2, reset_timeout=300, rate_per_second=1000, burst=1000)
+
+    for _ in range(2):
+        assert guard.try_acquire("a") == (0, True)
+        guard.record_result("a", {'status_code': 503})
+
+    assert guard.try_acquire("a") == (0, False)
+    assert guard.open_hosts() == ["a"]
+
+
+def test_client_errors_do_not_count_against_the_host():
+    guard = HostGuard(failure_threshold=1, rate_per_second=1000, burst=1000)
+
+    guard.try_acquire("a")
+    guard.record_result("a", {'status_code': 404})
+
+    assert guard.try_acquire("a") == (0, True)
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from codec import decode_record_field
+
+
+def test_decode_record_field_survives_updated_at_change():
+    record = {"id": 1, "headers": '{"Accept": "application/json"}', "updated_at": datetime(2026, 1, 1)}
+    first = decode_record_field(record, "headers")
+
+    refreshed = {**record, "updated_at": datetime(2026, 1, 2)}
+
+    assert decode_record_field(refreshed, "headers") is first
+    assert first == {"Accept": "application/json"}
+
+
+def test_decode_record_field_reparses_changed_value():
+    record = {"id": 2, "parameters": '{"page": 1}'}
+    assert decode_record_field(record, "parameters") == {"page": 1}
+
+    record["parameters"] = '{"page": 2}'
+    assert decode_record_field(record, "parameters") == {"page": 2}
+
+
+def test_decode_record_field_empty():
+    assert decode_record_field({"id": 3, "headers": None}, "headers") == {}
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime, timezone
+
+from templates import compile_template, match_path_params, render_record
+
+
+NOW = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_static_body_compiles_to_one_segment():
+    compiled = compile_template({"status": "ok", "items": [1, 2]})
+
+    assert compiled.is_static
+    assert json.loads(compiled.render()) == {"status": "ok", "items": [1, 2]}
+
+
+def test_empty_body_renders_empty():
+    assert compile_template(None).render() == b""
+
+
+def test_unknown_placeholder_is_kept_literally():
+    compiled = compile_template('{"name": "{{nope}}"}')
+
+    assert compiled.is_static
+    assert compiled.render() == b'{"name": "{{nope}}"}'
+
+
+def test_now_and_path_and_query_placeholders():
+    compiled = compile_template('{"at": "{{now:%Y-%m-%d}}", "user": "{{path.user_id}}", "page": "{{query.page:1}}"}')
+
+    body = json.loads(compiled.render(path_params={"user_id": "42"}, query_params={}, now=NOW))
+
+    assert not compiled.is_static
+    assert body == {"at": "2026-01-02", "user": "42", "page": "1"}
+
+
+def test_substituted_values_are_escaped():
+    compiled = compile_template('{"user": "{{path.user_id}}"}')
+
+    body = compiled.render(path_params={"user_id": 'a"b'}, now=NOW)
+
+    assert json.loads(body) == {"user": 'a"b'}
+
+
+def test_counters_are_separate_per_record():
+    compiled = compile_template('{"n": {{counter.test_separate}}}')
+
+    first = [json.loads(compiled.render(record_id=101))["n"] for _ in range(2)]
+    other = json.loads(compiled.render(record_id=102))["n"]
+
+    assert first == [1, 2]
+    assert other == 1
+
+
+def test_match_path_params():
+    assert match_path_params("/users/{user_id}/orders/{order_id}", "/users/7/orders/9?x=1") == {"user_id": "7", "order_id": "9"}
+    assert match_path_params("/users/{user_id}", "/accounts/7") is None
+    assert match_path_params("/users.json", "/usersXjson") is None
+
+
+def test_render_record_uses_routing_url_params():
+    record = {
+        "id": 201,
+        "response": {"id": "{{path.user_id}}"},
+        "routing_url": "/users/{user_id}",
+        "updated_at": NOW,
+    }
+
+    assert json.loads(render_record(record, request_path="/users/55")) == {"id": "55"}
+
+
+def test_json_scalar_bodies_compile():
+    for value, expected in ((42, b"42"), (True, b"true"), (3.5, b"3.5")):
+        compiled = compile_template(value)
+
+        assert compiled.is_static
+        assert compiled.render() == expected